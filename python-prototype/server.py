@@ -1,17 +1,23 @@
 # python -m src.server
 
 import asyncio
-import json
+import logging
+import logging.handlers
 import os
+import queue
+import tempfile
 import traceback
-from decimal import Decimal
-from typing import Any
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Final
+
+import orjson
 
 from engine.engine import MatchingEngine
 from engine.interface import EngineInterface, translate_client_message
 from orderbook.audit import SystemAuditor
-from orderbook.economy import EconomyManager
-from orderbook.id_mapper import UserIdMapper
+from orderbook.economy import EconomyManager, format_cents
+from orderbook.id_mapper import OrderIdMapper, UserIdMapper
 from orderbook.types import (
     ActionResponse,
     SettlementResponse,
@@ -21,18 +27,52 @@ from orderbook.types import (
 # --- Configuration & Types ---
 
 # Set to False during stress tests to save CPU cycles
-DEBUG_MODE = True
+DEBUG_MODE: Final = True
+
+# TEST_MODE=1 enables test-only admin requests (currently "flush")
+TEST_MODE: Final = os.getenv("TEST_MODE") == "1"
+
+# Per-request chatter goes through logging with %-style args, so nothing is formatted
+# unless DEBUG is enabled (see main() for the handler setup)
+logger = logging.getLogger(__name__)
 DB_FILE = "state.json"
+
+# Length-prefixed framing (see handle_client)
+FRAMED_MARKER: Final = b"\x00"
+FRAME_HEADER_SIZE: Final = 4
+
+# Bytes queued in the transport before handle_client awaits drain() (asyncio's default high-water mark)
+DRAIN_THRESHOLD: Final = 64 * 1024
 ResponseTypes = ActionResponse | SnapshotResponse | SettlementResponse | dict[str, Any]
 
 
-class DecimalEncoder(json.JSONEncoder):
-    """Prevents 'Object of type Decimal is not JSON serializable' crash."""
+def _atomic_write(path: str, payload: bytes) -> None:
+    """
+    Write payload to a temp file, fsync, then swap it into place.
+    A crash mid-write leaves the previous save intact instead of a truncated file.
+    Each call gets its own temp file so a flush and a periodic save can overlap.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# libuv-backed event loop when available (not on Windows); otherwise stock asyncio
+try:
+    import uvloop
 
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super().default(obj)
+    _loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = uvloop.new_event_loop
+except ImportError:
+    _loop_factory = None
 
 
 # --- Server Logic ---
@@ -49,6 +89,7 @@ class OrderBookServer:
         self.engine = MatchingEngine()
         self.auditor = SystemAuditor(engine=self.engine, economy=self.economy)
         self.user_id_mapper = UserIdMapper()
+        self.order_id_mapper = OrderIdMapper()
 
         self.interface = EngineInterface(
             engine=self.engine,
@@ -56,24 +97,51 @@ class OrderBookServer:
             auditor=self.auditor,
             user_id_mapper=self.user_id_mapper,
             debug_mode=DEBUG_MODE,
+            order_id_mapper=self.order_id_mapper,
         )
 
+        # Every read/write of engine, economy and mapper state runs on this single thread.
+        # The event loop keeps doing socket I/O while an order matches, and state stays
+        # single-threaded (no locks).
+        self._engine_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine")
+
+        # Request type -> handler for commands not yet in the Interface
+        self._legacy_handlers: dict[Any, Callable[[dict[str, Any]], dict[str, Any]]] = {
+            "balance": self._handle_balance,
+            "proof_of_walk": self._handle_proof_of_walk,
+        }
+        if TEST_MODE:
+            self._legacy_handlers["flush"] = self._handle_flush
+
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         """
         Runs once for every connection.
         10 concurrent versions if 10 people connect.
         """
         addr = writer.get_extra_info("peername")
-        if DEBUG_MODE:
-            print(f"[+] New connection from {addr}")
+        logger.debug("[+] New connection from %s", addr)
 
         try:
+            # Framing is picked once per connection from the first byte.
+            # 0x00 starts a 4-byte big-endian length prefix (payloads < 16 MiB can't start any other way);
+            # anything else is newline-delimited JSON (iOS client, nc).
+            try:
+                pending = await reader.readexactly(1)
+            except (asyncio.IncompleteReadError, ConnectionResetError):
+                return
+            framed = pending == FRAMED_MARKER
+            transport = writer.transport
+
             while True:
-                # Wait for data (ending in \n)
                 try:
-                    data = await reader.readuntil(b"\n")
-                    if not data:
-                        break
+                    if framed:
+                        # Length header then payload, no delimiter scan
+                        header = pending + await reader.readexactly(FRAME_HEADER_SIZE - len(pending))
+                        data = await reader.readexactly(int.from_bytes(header, "big"))
+                    else:
+                        # Wait for data (ending in \n)
+                        data = pending + await reader.readuntil(b"\n")
+                    pending = b""
                 except (
                     asyncio.IncompleteReadError,
                     ConnectionResetError,
@@ -81,48 +149,67 @@ class OrderBookServer:
                 ):
                     break  # Client closed connection or bot disconnected
 
-                message = data.decode().strip()
-                if not message:
+                if not framed and data.isspace():
                     continue  # Ignore empty lines/pings
 
-                # Parse JSON
+                # Parse JSON straight from bytes (orjson skips the trailing newline, no decode/strip copy)
                 try:
-                    request = json.loads(message)
-                except json.JSONDecodeError:
-                    if DEBUG_MODE:
-                        print(f"[!] Invalid JSON from {addr}: {message[:50]}")
+                    request = orjson.loads(data)
+                except orjson.JSONDecodeError:
+                    logger.debug("[!] Invalid JSON from %s: %r", addr, data[:50])
                     continue
 
                 # Dispatch request to handler
                 resp = await self.process_request(request, addr)
 
                 # Write response
-                writer.write((json.dumps(resp, cls=DecimalEncoder) + "\n").encode())
-                await writer.drain()
+                # Handlers format cents/Decimals as strings themselves, so orjson never needs a default= callback.
+                # Trade dataclasses in place_order responses serialize natively.
+                if framed:
+                    payload = orjson.dumps(resp)
+                    writer.write(len(payload).to_bytes(FRAME_HEADER_SIZE, "big") + payload)
+                else:
+                    # OPT_APPEND_NEWLINE frames the line inside the same buffer (no concat copy).
+                    writer.write(orjson.dumps(resp, option=orjson.OPT_APPEND_NEWLINE))
+
+                # Only wait on the socket once replies back up (pipelining client / slow reader).
+                # Below that, write() already handed the bytes to the kernel.
+                if transport.get_write_buffer_size() > DRAIN_THRESHOLD:
+                    await writer.drain()
 
         except Exception as e:
-            print(f"[!] Connection Error with {addr}: {e}")
-            if DEBUG_MODE:
-                traceback.print_exc()
+            # Unexpected failures (clean disconnects are handled above): log at ERROR so they show in production
+            logger.exception("[!] Connection Error with %s: %s", addr, e)
         finally:
             writer.close()
             try:
                 await writer.wait_closed()
             except (ConnectionResetError, asyncio.IncompleteReadError, OSError):
                 pass
-            if DEBUG_MODE:
-                print(f"[-] Client {addr} disconnected.")
+            logger.debug("[-] Client %s disconnected.", addr)
 
     async def process_request(self, request: dict[str, Any], addr: Any) -> ResponseTypes:
+        """Run the request on the engine thread so the loop keeps serving sockets meanwhile."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._engine_executor, self._process_request_sync, request, addr)
+
+    def _process_request_sync(self, request: dict[str, Any], addr: Any) -> ResponseTypes:
         """
         Request Handler.
         1. Translate JSON -> EngineCommand
         2. Executes via Interface
         3. Formats response for TCP
+
+        Legacy/info commands are looked up in a dict first, so they no longer go
+        through a failed translate + ValueError to be found.
         """
         try:
+            legacy_handler = self._legacy_handlers.get(request.get("type"))
+            if legacy_handler is not None:
+                return legacy_handler(request)
+
             # Convert JSON to EngineCommand
-            command = translate_client_message(request, self.user_id_mapper)
+            command = translate_client_message(request, self.user_id_mapper, self.order_id_mapper)
 
             # Execute: Interface handles logic/locking/matching
             # Returns EngineResponse object (success, data, message)
@@ -151,24 +238,15 @@ class OrderBookServer:
             return response
 
         except ValueError:
-            # If translate_client_message fails,
-            # try legacy/info command.
-            req_type = request.get("type")
-
-            if req_type == "balance":
-                return self._handle_balance(request)
-            elif req_type == "proof_of_walk":
-                return self._handle_proof_of_walk(request)
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Unknown or malformed command: {req_type}",
-                }
+            # translate_client_message or a legacy handler rejected the request
+            return {
+                "status": "error",
+                "message": f"Unknown or malformed command: {request.get('type')}",
+            }
 
         except Exception as e:
-            print(f"[{addr}] Unexpected Logic Error: {e}")
-            if DEBUG_MODE:
-                traceback.print_exc()
+            # Client only sees a generic error, so the traceback has to reach the log
+            logger.exception("[%s] Unexpected Logic Error: %s", addr, e)
             return {"status": "error", "message": "Internal server error"}
 
     # --- Legacy / Info Handlers (Not yet in Interface) ---
@@ -183,8 +261,8 @@ class OrderBookServer:
 
         return {
             "status": "ok",
-            "minted": str(minted),
-            "new_balance": str(new_balance),
+            "minted": format_cents(minted),
+            "new_balance": format_cents(new_balance),
         }
 
     def _handle_balance(self, req: dict[str, Any]) -> dict[str, Any]:
@@ -193,27 +271,35 @@ class OrderBookServer:
         account = self.economy.get_account(user_id)
 
         # Format Portfolio for Swift Client
-        positions_list = []
-        for m_id, position in account.portfolio.items():
-            if position.quantity != 0:
-                positions_list.append(
-                    {
-                        "market_id": m_id,
-                        "side": "LONG" if position.quantity > 0 else "SHORT",
-                        "qty": abs(position.quantity),
-                        "average_price": str(position.average_entry_price),
-                    }
-                )
+        # Economy prunes flat positions, so every entry is an open one
+        positions_list = [
+            {
+                "market_id": m_id,
+                "side": "LONG" if position.quantity > 0 else "SHORT",
+                "qty": abs(position.quantity),
+                "average_price": str(position.average_entry_price),
+            }
+            for m_id, position in account.portfolio.items()
+        ]
 
         return {
             "status": "ok",
             "user_id": user_id,
-            "available": str(account.balance_available),
-            "locked": str(account.balance_locked),
-            "total_equity": str(account.total_equity()),
+            "available": format_cents(account.balance_available),
+            "locked": format_cents(account.balance_locked),
+            "total_equity": format_cents(account.total_equity()),
             "positions": positions_list,
         }
 
+    def _handle_flush(self, req: dict[str, Any]) -> dict[str, Any]:
+        """
+        Test-only: save now and reply once the file is fsynced.
+        Lets tests wait on the write itself instead of sleeping past a save.
+        Runs on the engine thread, so the snapshot is consistent.
+        """
+        _atomic_write(DB_FILE, self._serialize_state())
+        return {"status": "flushed"}
+
     # def _handle_read(self, req: dict[str, Any]) -> SnapshotResponse:
     #     """
     #     Return order book snapshot.
@@ -264,13 +350,15 @@ class OrderBookServer:
 
     # --- Persistence ---
 
-    def save_world(self) -> None:
-        """Save engine, economy, and mapper state to JSON."""
-        print("[*] Saving world state...")
-
+    def _serialize_state(self) -> bytes:
+        """
+        Snapshot engine, economy, and mapper state into JSON bytes.
+        Must run on the engine thread (or before serving): handlers mutate this state.
+        """
         engine_state = self.engine.dump_state()
         economy_state = self.economy.dump_state()
         mapper_state = self.user_id_mapper.dump_state()
+        order_ids_state = self.order_id_mapper.dump_state()
 
         # Engine already returns markets with string keys ("1,480")
         # No conversion needed here
@@ -278,11 +366,20 @@ class OrderBookServer:
             "economy": economy_state,
             "engine": engine_state,
             "mapper": mapper_state,
+            "order_ids": order_ids_state,
         }
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
 
+    async def save_world_async(self) -> None:
+        """
+        Save without stalling clients.
+        Snapshot on the engine thread (consistent state), write + fsync on a worker thread.
+        """
+        print("[*] Saving world state...")
         try:
-            with open(DB_FILE, "w") as f:
-                json.dump(data, f, indent=2, cls=DecimalEncoder)
+            loop = asyncio.get_running_loop()
+            payload = await loop.run_in_executor(self._engine_executor, self._serialize_state)
+            await asyncio.to_thread(_atomic_write, DB_FILE, payload)
             print("[*] Save complete.")
         except Exception as e:
             print(f"[!] SAVE FAILED: {e}")
@@ -295,8 +392,8 @@ class OrderBookServer:
 
         print("[*] Loading world state...")
         try:
-            with open(DB_FILE) as f:
-                data = json.load(f)
+            with open(DB_FILE, "rb") as f:
+                data = orjson.loads(f.read())
 
             if "economy" in data:
                 self.economy.load_state(data["economy"])
@@ -304,6 +401,9 @@ class OrderBookServer:
             if "mapper" in data:
                 self.user_id_mapper.load_state(data["mapper"])
 
+            if "order_ids" in data:
+                self.order_id_mapper.load_state(data["order_ids"])
+
             if "engine" in data:
                 # Engine.load_state handles "1,60" string parsing internally
                 self.engine.load_state(data["engine"])
@@ -322,7 +422,7 @@ class OrderBookServer:
         print("[+] Seeding Dev Data...")
 
         # Fund the market maker (they need capital to provide liquidity)
-        self.economy.get_account("market_maker").balance_available = Decimal("1000.00")
+        self.economy.get_account("market_maker").balance_available = 100000
         print("[+] Funded market_maker with $1000.00")
 
         # We could also use Interface to seed data.
@@ -336,7 +436,7 @@ class OrderBookServer:
 
         # Place Seed Orders (Prices in Cents)
         # Buy 10 contracts at $0.40 (costs $4.00)
-        if self.economy.attempt_order_lock("market_maker", Decimal("0.40"), 10):
+        if self.economy.attempt_order_lock("market_maker", 40, 10):
             self.engine.process_order(
                 market_id=m_id,
                 side="buy",
@@ -368,7 +468,7 @@ async def periodic_save(server: OrderBookServer, interval: int = 300) -> None:
     """Periodically save world state every `interval` seconds."""
     while True:
         await asyncio.sleep(interval)
-        server.save_world()
+        await server.save_world_async()
 
 
 # --- Main Entry Point ---
@@ -376,6 +476,17 @@ async def periodic_save(server: OrderBookServer, interval: int = 300) -> None:
 
 async def main() -> None:
     """Start the order book server and background tasks."""
+    # Log records are queued on the event loop and written to stderr by a listener thread,
+    # so a slow terminal never stalls request handling
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    logging.basicConfig(
+        level=logging.DEBUG if DEBUG_MODE else logging.INFO,
+        format="%(message)s",
+        handlers=[logging.handlers.QueueHandler(log_queue)],
+    )
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+
     server = OrderBookServer()
     server.load_world()
     server.seed_dev_data()
@@ -387,17 +498,23 @@ async def main() -> None:
     print(f"[*] Serving on {addrs}")
 
     # Run server and periodic save concurrently
-    async with tcp_server:
-        await asyncio.gather(
-            tcp_server.serve_forever(),
-            periodic_save(server),
-        )
+    try:
+        async with tcp_server:
+            await asyncio.gather(
+                tcp_server.serve_forever(),
+                periodic_save(server),
+            )
+    finally:
+        server._engine_executor.shutdown()
+        listener.stop()
 
 
 if __name__ == "__main__":
     server_instance = None
     try:
-        asyncio.run(main())
+        # asyncio.run() only takes loop_factory on 3.12+; Runner has it since 3.11
+        with asyncio.Runner(loop_factory=_loop_factory) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         print("\n[!] Stopping server...")
         # Note: server_instance is not accessible here in the finally block
@@ -1,16 +1,26 @@
 # Usage: PYTHONPATH=src uv run simulation.py
 
 import asyncio
-import json
 import random
 import sys
+from collections.abc import Callable
 from typing import Any, NoReturn, TypedDict, cast
 
+import orjson
+
 # NoReturn for infinite loops: functions never exits
 
 HOST = "127.0.0.1"
 PORT = 8888
 
+# libuv-backed event loop when available (not on Windows); otherwise stock asyncio
+try:
+    import uvloop
+
+    _loop_factory: Callable[[], asyncio.AbstractEventLoop] | None = uvloop.new_event_loop
+except ImportError:
+    _loop_factory = None
+
 
 # Define a Type for MARKET ID
 class MarketIdDict(TypedDict):
@@ -21,27 +31,38 @@ class MarketIdDict(TypedDict):
 # Specific market we're trading on.
 MARKET_ID: MarketIdDict = {"target_user_id": 1, "threshold_minutes": 60}
 
+# Ticker's poll never changes, so encode it once instead of every frame
+READ_PING = orjson.dumps({"type": "read"}, option=orjson.OPT_APPEND_NEWLINE)
+
 
 # Network Helpers
 async def send_json(writer: asyncio.StreamWriter, data: dict[str, Any]) -> None:
     """
     Helper to send NDJSON.
-    Encodes the string to bytes before writing to socket.
+    orjson encodes straight to bytes, newline included.
     """
-    message = json.dumps(data) + "\n"
-    writer.write(message.encode())
+    writer.write(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE))
     # Drain pauses executions until OS clears buffer.
     # Prevents overwhelming socket if we send too fast.
     await writer.drain()
 
 
+async def send_json_batch(writer: asyncio.StreamWriter, batch: list[dict[str, Any]]) -> None:
+    """
+    Helper to send several NDJSON messages with one writelines and one drain.
+    The transport can hand the buffers to the socket together, without joining them first.
+    """
+    writer.writelines([orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE) for data in batch])
+    await writer.drain()
+
+
 async def read_json(reader: asyncio.StreamReader) -> dict[str, Any]:
     """
     Helper to read one line of JSON response.
     Blocks until a newline (\n) is received.
     """
     data = await reader.readuntil(b"\n")
-    return cast(dict[str, Any], json.loads(data.decode()))
+    return cast(dict[str, Any], orjson.loads(data))
 
 
 # Market Maker
@@ -67,6 +88,11 @@ class MarketMakerBot:
             sys.exit(1)
 
         try:
+            # Fixed cadence: schedule ticks against the loop clock so the time
+            # spent quoting doesn't stretch the interval
+            loop = asyncio.get_running_loop()
+            next_tick = loop.time()
+
             while True:
                 # Random Walk: Simulate external factors.
                 # IRL: Order flow imbalance.
@@ -82,40 +108,39 @@ class MarketMakerBot:
 
                 # Place Orders (Quoting)
                 # Two-Sided Quote: Simultaneous Buy and Sell
+                # Pipelined: both quotes go out in one writelines + drain,
+                # then both confirmations are read (server replies in order)
 
                 # Side : BID (Buy Limit)
-                await send_json(
-                    writer,
-                    {
-                        "type": "limit",
-                        "market_id": MARKET_ID,
-                        "side": "buy",
-                        "price": bid_price,
-                        "qty": 5,
-                        "user_id": 101,
-                        "id": random.randint(1000, 999999),
-                    },
-                )
-                _ = await read_json(reader)  # Consume confirmation
+                bid = {
+                    "type": "limit",
+                    "market_id": MARKET_ID,
+                    "side": "buy",
+                    "price": bid_price,
+                    "qty": 5,
+                    "user_id": 101,
+                    "id": random.randint(1000, 999999),
+                }
 
                 # Side : ASK (Sell Limit)
-                await send_json(
-                    writer,
-                    {
-                        "type": "limit",
-                        "market_id": MARKET_ID,
-                        "side": "sell",
-                        "price": ask_price,
-                        "qty": 5,
-                        "user_id": 101,
-                        "id": random.randint(1000, 999999),
-                    },
-                )
-                _ = await read_json(reader)  # Consume confirmation
+                ask = {
+                    "type": "limit",
+                    "market_id": MARKET_ID,
+                    "side": "sell",
+                    "price": ask_price,
+                    "qty": 5,
+                    "user_id": 101,
+                    "id": random.randint(1000, 999999),
+                }
+
+                await send_json_batch(writer, [bid, ask])
+                _ = await read_json(reader)  # Consume BID confirmation
+                _ = await read_json(reader)  # Consume ASK confirmation
 
                 # Wait.
                 # It's discrete events.
-                await asyncio.sleep(0.5)
+                next_tick += 0.5
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
 
         except Exception as e:
             print(f"[!] [{self.name}] Crash: {e}")
@@ -143,9 +168,13 @@ class LiquidityTakerBot:
             sys.exit(1)
 
         try:
+            loop = asyncio.get_running_loop()
+            next_tick = loop.time()
+
             while True:
-                # Wait
-                await asyncio.sleep(random.uniform(1.0, 3.0))
+                # Wait (random gap, measured from the last scheduled tick)
+                next_tick += random.uniform(1.0, 3.0)
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
 
                 side = random.choice(["buy", "sell"])
 
@@ -194,36 +223,25 @@ async def ticker_tape() -> NoReturn:
             # Fetch State
             # Later: Modify "read" in server.py to accept market_id
             # Right now: server returns the first market it finds.
-            await send_json(writer, {"type": "read"})
+            writer.write(READ_PING)
+            await writer.drain()
             resp = await read_json(reader)
 
+            # OrderBook.snapshot() already sends levels best-first:
+            # Bids highest price first, Asks lowest price first. No client-side sort.
             bids = resp.get("bids", [])
             asks = resp.get("asks", [])
 
-            # Sort
-            # Bids: Highest price is best (Top)
-            bids.sort(key=lambda x: x["price"], reverse=True)
-            # Asks: Lowest price is best (Top)
-            asks.sort(key=lambda x: x["price"])
-
-            # Clear Screen
-            print("\033[H\033[J", end="")
+            # Build the whole frame, then write it once (one syscall per frame, no flicker)
+            frame: list[str] = []
 
             # Render Header
-            print("=== SHORTYOURFRIENDS LOB ===")
-            print(f"Market: User {MARKET_ID['target_user_id']} > {MARKET_ID['threshold_minutes']}m")
-            print(f"Spread: {calculate_spread(bids, asks)}")
-            print("-" * 42)
-            print(f"{'BID QTY':<10} | {'PRICE':^12} | {'ASK QTY':>10}")
-            print("-" * 42)
-
-            # Render Header
-            print("=== SHORTYOURFRIENDS LOB ===")
-            print(f"Market: User {MARKET_ID['target_user_id']} > {MARKET_ID['threshold_minutes']}m")
-            print(f"Spread: {calculate_spread(bids, asks)}")
-            print("-" * 42)
-            print(f"{'BID QTY':<10} | {'PRICE':^12} | {'ASK QTY':>10}")
-            print("-" * 42)
+            frame.append("=== SHORTYOURFRIENDS LOB ===")
+            frame.append(f"Market: User {MARKET_ID['target_user_id']} > {MARKET_ID['threshold_minutes']}m")
+            frame.append(f"Spread: {calculate_spread(bids, asks)}")
+            frame.append("-" * 42)
+            frame.append(f"{'BID QTY':<10} | {'PRICE':^12} | {'ASK QTY':>10}")
+            frame.append("-" * 42)
 
             # Render Rows (Top 10 Levels)
             # Standard LOB view shows bids on left (green), asks on right (red)
@@ -231,7 +249,7 @@ async def ticker_tape() -> NoReturn:
             for i in range(10):
                 if i < len(bids) and i < len(asks):
                     # Both bid and ask exist at this level
-                    print(
+                    frame.append(
                         f"\033[92m{bids[i]['volume']:<10}\033[0m | "
                         f"\033[92m{bids[i]['price']:>4}\033[0m  "
                         f"\033[93m{asks[i]['price']:<4}\033[0m | "
@@ -239,15 +257,22 @@ async def ticker_tape() -> NoReturn:
                     )
                 elif i < len(bids):
                     # Only bid exists
-                    print(f"\033[92m{bids[i]['volume']:<10}\033[0m | \033[92m{bids[i]['price']:^12}\033[0m | {'':>10}")
+                    frame.append(
+                        f"\033[92m{bids[i]['volume']:<10}\033[0m | \033[92m{bids[i]['price']:^12}\033[0m | {'':>10}"
+                    )
                 elif i < len(asks):
                     # Only ask exists
-                    print(f"{'':<10} | \033[91m{asks[i]['price']:^12}\033[0m | \033[91m{asks[i]['volume']:>10}\033[0m")
+                    frame.append(
+                        f"{'':<10} | \033[91m{asks[i]['price']:^12}\033[0m | \033[91m{asks[i]['volume']:>10}\033[0m"
+                    )
                 else:
                     # Empty row
-                    print(f"{'':<10} | {'':^12} | {'':>10}")
+                    frame.append(f"{'':<10} | {'':^12} | {'':>10}")
 
-            print("-" * 42)
+            frame.append("-" * 42)
+            # Clear Screen + frame
+            sys.stdout.write("\033[H\033[J" + "\n".join(frame) + "\n")
+            sys.stdout.flush()
             await asyncio.sleep(0.2)
 
     except Exception:
@@ -285,6 +310,8 @@ if __name__ == "__main__":
         # Windows support for asyncio
         if sys.platform == "win32":
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        asyncio.run(main())
+        # asyncio.run() only takes loop_factory on 3.12+; Runner has it since 3.11
+        with asyncio.Runner(loop_factory=_loop_factory) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         print("\n[*] Simulation Stopped.")
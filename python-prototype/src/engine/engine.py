@@ -1,7 +1,10 @@
+import time
+from collections.abc import Iterator, Mapping
 from dataclasses import dataclass, field
 from typing import Any
 
 from orderbook.book import OrderBook
+from orderbook.linked_list import OrderList
 from orderbook.trade import Trade
 from orderbook.types import PriceLevel
 
@@ -9,7 +12,7 @@ from orderbook.types import PriceLevel
 type MarketId = tuple[int, int]
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderMetadata:
     market_id: MarketId
     side: str
@@ -18,7 +21,26 @@ class OrderMetadata:
     user_id: int
 
 
-@dataclass
+# Saved order row: (order_id, user_id, price, quantity, timestamp)
+type OrderRow = tuple[int, int, int, int, float]
+
+
+def _order_rows(order_list_data: list[Any]) -> Iterator[OrderRow]:
+    """
+    Saved orders -> rows for OrderBook.load_orders.
+    Current saves hold [id, user_id, price, qty, timestamp] rows as-is;
+    older saves hold one dict per order.
+    """
+    now = time.time()  # Orders saved without a timestamp count as placed at load time
+    for o_data in order_list_data:
+        if isinstance(o_data, dict):
+            yield o_data["id"], o_data["user_id"], o_data["price"], o_data["qty"], o_data.get("timestamp", now)
+        else:
+            order_id, user_id, price, quantity, timestamp = o_data
+            yield order_id, user_id, price, quantity, timestamp
+
+
+@dataclass(slots=True)
 class MatchingEngine:
     """
     Multi-market matching engine.
@@ -28,22 +50,48 @@ class MatchingEngine:
     _markets: dict[MarketId, OrderBook] = field(default_factory=dict)
     _market_names: dict[MarketId, str] = field(default_factory=dict)
 
+    # Owner index: target_user_id -> that user's market IDs
+    # Settlement only touches one user's markets, so skip the full scan
+    _markets_by_user: dict[int, list[MarketId]] = field(default_factory=dict)
+
+    # Serialized form of each market ID ("user_id,minutes"), built once on creation
+    _market_keys: dict[MarketId, str] = field(default_factory=dict)
+
+    # Serialized bids/asks per market, tagged with the book version they were built from.
+    # dump_state only re-walks books that changed since the last save.
+    _dump_cache: dict[MarketId, tuple[int, dict[str, Any]]] = field(default_factory=dict)
+
+    # get_active_markets entry per market, tagged with the book version it was built from
+    _active_cache: dict[MarketId, tuple[int, dict[str, Any]]] = field(default_factory=dict)
+
     # Global Registry
     # OrderID -> OrderMetadata
     _order_registry: dict[int, OrderMetadata] = field(default_factory=dict)
 
-    def get_or_create_market(self, market_id: MarketId) -> OrderBook:
-        if market_id not in self._markets:
-            self._markets[market_id] = OrderBook()
-        return self._markets[market_id]
+    # Metadata of fully filled makers, reused for the next resting order.
+    # Cancelled metadata is handed back to the caller, so it never lands here.
+    _metadata_pool: list[OrderMetadata] = field(default_factory=list)
 
-    def create_market(self, market_id: MarketId, name: str) -> None:
+    def get_or_create_market(self, market_id: MarketId) -> OrderBook:
+        # Single lookup on the common path (market already exists)
+        book = self._markets.get(market_id)
+        if book is None:
+            book = self._markets[market_id] = OrderBook()
+            self._markets_by_user.setdefault(market_id[0], []).append(market_id)
+            self._market_keys[market_id] = f"{market_id[0]},{market_id[1]}"
+        return book
+
+    def create_market(self, market_id: MarketId, name: str) -> OrderBook:
         """
         Creates a market with a display name.
         Is called by Seed Data in server.
+        Returns the market's book.
         """
-        self.get_or_create_market(market_id)
+        book = self.get_or_create_market(market_id)
         self._market_names[market_id] = name
+        # Name is part of the cached entry, so rebuild it on next read
+        self._active_cache.pop(market_id, None)
+        return book
 
     def process_order(
         self,
@@ -53,50 +101,70 @@ class MatchingEngine:
         quantity: int,
         order_id: int,
         user_id: int,
+        book: OrderBook | None = None,
     ) -> list[Trade]:
-        book = self.get_or_create_market(market_id)
+        """
+        Matches an order in market_id's book.
+        Callers that already looked the book up pass it as book, saving a second market probe.
+        """
+        if book is None:
+            book = self.get_or_create_market(market_id)
 
         # Execute matching logic
         trades = book.process_order(side, price, quantity, order_id, user_id)
 
         # Sync Registry for Makers (Existing orders that got hit)
-        # Remove any Maker orders that were fully filled
+        # One book probe and one registry probe per fill
+        orders = book._orders
+        registry = self._order_registry
+        pool = self._metadata_pool
         for trade in trades:
-            # Fully consumed or partially filled?
-            if trade.maker_order_id not in book._orders:
+            maker_id = trade.maker_order_id
+            maker_node = orders.get(maker_id)
+            if maker_node is None:
                 # Full fill: remove from registry
-                self._order_registry.pop(trade.maker_order_id, None)
+                filled = registry.pop(maker_id, None)
+                if filled is not None:
+                    pool.append(filled)
+                continue
+
+            # Partial fill: Update registry with new remaining quantity
+            meta = registry.get(maker_id)
+            if meta is not None:
+                # Update the metadata object in place
+                meta.quantity = maker_node.quantity
             else:
-                # Partial fill: Update registry with new remaining quantity
-                # Fetch actual node from book's internal storage
-                maker_node = book._orders[trade.maker_order_id]
-
-                if trade.maker_order_id in self._order_registry:
-                    # Update the metadata object in place
-                    self._order_registry[trade.maker_order_id].quantity = maker_node.quantity
-                else:
-                    # Maker order exists in book but not in registry
-                    # Reconstruct metadata from book state
-                    self._order_registry[trade.maker_order_id] = OrderMetadata(
-                        market_id=market_id,
-                        side="sell" if side == "buy" else "buy",  # Opposite side
-                        price=maker_node.price,
-                        quantity=maker_node.quantity,
-                        user_id=maker_node.user_id,
-                    )
+                # Maker order exists in book but not in registry
+                # Reconstruct metadata from book state
+                registry[maker_id] = OrderMetadata(
+                    market_id=market_id,
+                    side="sell" if side == "buy" else "buy",  # Opposite side
+                    price=maker_node.price,
+                    quantity=maker_node.quantity,
+                    user_id=maker_node.user_id,
+                )
 
         # Sync Registry for Taker (new order you just placed)
         # If the taker order wasn't fully filled,
         # it is now a Maker resting on the book. Register its location
-        if order_id in book._orders:
-            resting_order = book._orders[order_id]
-            self._order_registry[order_id] = OrderMetadata(
-                market_id=market_id,
-                side=side,
-                price=price,
-                quantity=resting_order.quantity,
-                user_id=user_id,
-            )
+        resting_order = orders.get(order_id)
+        if resting_order is not None:
+            if pool:
+                meta = pool.pop()
+                meta.market_id = market_id
+                meta.side = side
+                meta.price = price
+                meta.quantity = resting_order.quantity
+                meta.user_id = user_id
+            else:
+                meta = OrderMetadata(
+                    market_id=market_id,
+                    side=side,
+                    price=price,
+                    quantity=resting_order.quantity,
+                    user_id=user_id,
+                )
+            registry[order_id] = meta
 
         return trades
 
@@ -105,9 +173,10 @@ class MatchingEngine:
         Locates and cancels an order across any market in O(1) time.
         """
         # Map tells us which market the order is in.
-        meta = self._order_registry.get(order_id)
+        # Pop up front: the entry goes either way, so one probe finds and removes it.
+        meta = self._order_registry.pop(order_id, None)
 
-        if not meta:
+        if meta is None:
             # If not in map, then order was likely filled or cancelled.
             return None
 
@@ -116,15 +185,13 @@ class MatchingEngine:
         # so access specific book from _markets dictionary.
         book = self._markets.get(meta.market_id)
 
-        if book:
+        if book is not None:
             # Tell specific book to remove order from
             # its internal linked lists and internal _orders dict.
             book.cancel_order(order_id)
 
-        # Cleanup Registry
-        # Remove entry from global map
         # Return metadata so Server knows price/qty for refunds.
-        return self._order_registry.pop(order_id)
+        return meta
 
     def settle_markets_for_user(
         self,
@@ -137,12 +204,10 @@ class MatchingEngine:
         """
         all_trades: list[Trade] = []
 
-        for market_id in list(self._markets.keys()):
-            if market_id[0] == target_user_id:  # Same target user
-                threshold = market_id[1]
-                terminal_price = 1 if actual_screentime_minutes >= threshold else 0
-                trades = self._markets[market_id].settle_market(terminal_price)
-                all_trades.extend(trades)
+        for market_id in self._markets_by_user.get(target_user_id, ()):
+            threshold = market_id[1]
+            terminal_price = int(actual_screentime_minutes >= threshold)
+            self._markets[market_id].settle_market(terminal_price, all_trades)
 
         return all_trades
 
@@ -158,33 +223,37 @@ class MatchingEngine:
         """
         market_list = []
         for market_id, book in self._markets.items():
-            # Use max() for best bid and min() for best ask
-            # book._bids is a dict {price: OrderNode}, so we look at .keys()
-
-            best_bid = max(book._bids.keys()) if book._bids else None
-            best_ask = min(book._asks.keys()) if book._asks else None
-
-            target_user, minutes = market_id
-
-            # Use stored name or fallback to default string
-            display_name = self._market_names.get(market_id, f"{target_user} > {minutes}m")
-
-            market_list.append(
-                {
-                    "id": f"{target_user}_{minutes}",  # Unique ID for SwiftUI
-                    "name": display_name,
-                    "target_user": target_user,
-                    "threshold_minutes": minutes,
-                    # "best_bid": str(best_bid) if best_bid is not None else None,
-                    # "best_ask": str(best_ask) if best_ask is not None else None,
-                    # To match "volume" and "threshold_minutes" types
-                    "best_bid": best_bid,
-                    "best_ask": best_ask,
-                    "volume": 0,  # TODO: track volume
-                }
-            )
+            # Entries only change when the book does; reuse the cached dict otherwise
+            cached = self._active_cache.get(market_id)
+            if cached is None or cached[0] != book._version:
+                cached = self._active_cache[market_id] = (book._version, self._market_entry(market_id, book))
+            market_list.append(cached[1])
         return market_list
 
+    def _market_entry(self, market_id: MarketId, book: OrderBook) -> dict[str, Any]:
+        """Build one get_active_markets entry."""
+        # Top of book is cached per book version, so this is an O(1) read
+        best_bid = book.get_best_bid()
+        best_ask = book.get_best_ask()
+
+        target_user, minutes = market_id
+
+        # Use stored name or fallback to default string
+        display_name = self._market_names.get(market_id, f"{target_user} > {minutes}m")
+
+        return {
+            "id": f"{target_user}_{minutes}",  # Unique ID for SwiftUI
+            "name": display_name,
+            "target_user": target_user,
+            "threshold_minutes": minutes,
+            # "best_bid": str(best_bid) if best_bid is not None else None,
+            # "best_ask": str(best_ask) if best_ask is not None else None,
+            # To match "volume" and "threshold_minutes" types
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "volume": 0,  # TODO: track volume
+        }
+
     # TODO: add get_market_details() that returns graph data/history
 
     def dump_state(self) -> dict[str, Any]:
@@ -193,50 +262,46 @@ class MatchingEngine:
         Structure:
         {
             "market_key_str": {
-                "bids": [ {order_dict}, ... ],
-                "asks": [ {order_dict}, ... ]
+                "bids": [ [id, user_id, price, qty, timestamp], ... ],
+                "asks": [ [id, user_id, price, qty, timestamp], ... ]
             }
         }
+        Rows instead of per-order dicts: no repeated keys to build or encode,
+        and the side is already given by the list they're in.
         """
         markets_data: dict[str, Any] = {}
 
         # Helper
-        def serialize_orders(orders_map: dict[int, Any], side_label: str) -> list[dict[str, Any]]:
-            serialized_list: list[dict[str, Any]] = []
+        def serialize_orders(orders_map: Mapping[int, OrderList]) -> list[OrderRow]:
+            serialized_list: list[OrderRow] = []
 
-            # orders_map is {price: OrderNode}
-            # We use .values() to get the OrderNodes (not the price keys)
+            # orders_map is {price: OrderList}
+            # We use .values() to get the OrderLists (not the price keys)
             for order_list in orders_map.values():
-                curr = getattr(order_list, "head", None)
+                curr = order_list.head
 
                 # Walk the linked list if there are multiple orders at this price
-                while curr:
-                    serialized_list.append(
-                        {
-                            "id": curr.order_id,
-                            "user_id": curr.user_id,
-                            "price": int(curr.price),
-                            "qty": curr.quantity,
-                            "side": side_label,
-                            # Safe check for timestamp
-                            "timestamp": getattr(curr, "timestamp", 0),
-                        }
-                    )
-                    # Move to next order in linked list (safe check)
-                    curr = getattr(curr, "next", None)
+                while curr is not None:
+                    serialized_list.append((curr.order_id, curr.user_id, curr.price, curr.quantity, curr.timestamp))
+                    curr = curr.next_node
             return serialized_list
 
         for market_id, book in self._markets.items():
-            # Composite key needs to be a string for JSON
-            # key is tuple before converting to string
-            # key format: "user_id:minutes"
-
-            key_str = f"{market_id[0]},{market_id[1]}"  # Convert Tuple Key (user, minutes) -> String "user,minutes"
+            cached = self._dump_cache.get(market_id)
+            if cached is not None and cached[0] == book._version:
+                orders = cached[1]
+            else:
+                orders = {
+                    "bids": serialize_orders(book._bids),
+                    "asks": serialize_orders(book._asks),
+                }
+                self._dump_cache[market_id] = (book._version, orders)
 
-            markets_data[key_str] = {
+            # Composite key needs to be a string for JSON
+            # Tuple Key (user, minutes) -> String "user,minutes", cached at creation
+            markets_data[self._market_keys[market_id]] = {
                 "name": self._market_names.get(market_id, "Unknown Market"),
-                "bids": serialize_orders(book._bids, "buy"),
-                "asks": serialize_orders(book._asks, "sell"),
+                **orders,
             }
 
         return {"markets": markets_data}
@@ -250,15 +315,19 @@ class MatchingEngine:
 
         self._markets.clear()
         self._market_names.clear()
+        self._markets_by_user.clear()
+        self._market_keys.clear()
+        self._dump_cache.clear()
+        self._active_cache.clear()
 
         for key_str, market_data in state["markets"].items():
             try:
-                # Parse key: Handle the "alice,480" format from server.py
-                if "," in key_str:
-                    target_user_str, minutes_str = key_str.split(",")
-                elif ":" in key_str:
-                    target_user_str, minutes_str = key_str.split(":")
-                else:
+                # Parse key: Handle the "alice,480" format from server.py (older saves used ":")
+                # partition scans once and builds no list; an empty separator means not found
+                target_user_str, sep, minutes_str = key_str.partition(",")
+                if not sep:
+                    target_user_str, sep, minutes_str = key_str.partition(":")
+                if not sep:
                     # If it's just a raw tuple string or weird format, skip or log
                     print(f"[!] Skipping invalid market key: {key_str}")
                     continue
@@ -273,46 +342,19 @@ class MatchingEngine:
                     continue
 
                 # Reconstruct Tuple ID
-                market_id: MarketId = (target_user, int(minutes_str))
+                minutes = int(minutes_str)
+                market_id: MarketId = (target_user, minutes)
 
                 # Read name from JSON, or fallback to default
-                market_name = market_data.get("name", f"{target_user} > {minutes_str}m")
+                market_name = market_data.get("name", f"{target_user} > {minutes}m")
 
                 # Create market
                 self.create_market(market_id, market_name)
                 book = self._markets[market_id]
 
-                # Helper to restore orders
-                def restore_orders(order_list_data: list[dict[str, Any]], side: str) -> None:
-                    for o_data in order_list_data:
-                        # Pass arguments explicitly. Previously was Node object
-                        book.add_order(
-                            side=side,
-                            price=o_data["price"],
-                            quantity=o_data["qty"],
-                            order_id=o_data["id"],
-                            user_id=o_data["user_id"],
-                        )
-                        # Create node
-                        # node = OrderNode(
-                        #     order_id=o_data["id"],
-                        #     user_id=o_data["user_id"],
-                        #     price=o_data["price"],
-                        #     quantity=o_data["qty"],
-                        #     timestamp=o_data.get("timestamp", 0),
-                        # )
-                        # # Add to book directly
-                        # book.add_order(node)
-
-                        # Restore original timestamp for FIFO priority
-                        # add_order() creates a new timestamp (now). We overwrite it
-                        # with the old one so the order keeps its place in line.
-                        if "timestamp" in o_data and o_data["id"] in book._orders:
-                            book._orders[o_data["id"]].timestamp = o_data["timestamp"]
-
-                # Restore Bids and Asks
-                restore_orders(market_data.get("bids", []), "buy")
-                restore_orders(market_data.get("asks", []), "sell")
+                # Restore Bids and Asks in saved (FIFO) order, keeping original timestamps
+                book.load_orders("buy", _order_rows(market_data.get("bids", [])))
+                book.load_orders("sell", _order_rows(market_data.get("asks", [])))
 
             except ValueError as e:
                 print(f"[!] Error loading market {key_str}: {e}")
@@ -322,20 +364,13 @@ class MatchingEngine:
 
     def _rebuild_registry(self) -> None:
         """Rebuild registry from current book state after load."""
-        self._order_registry.clear()
+        registry = self._order_registry
+        registry.clear()
         for market_id, book in self._markets.items():
-            for order_id, order_node in book._orders.items():
-                # Determine side by checking which price list it's in
-                # If the price exists in bids, it's a buy order
-                if order_node.price in book._bids:
-                    side = "buy"
-                else:
-                    side = "sell"
-
-                self._order_registry[order_id] = OrderMetadata(
-                    market_id=market_id,
-                    side=side,
-                    price=order_node.price,
-                    quantity=order_node.quantity,
-                    user_id=order_node.user_id,
-                )
+            # Walk each side's levels: side and price are known per level, not looked up per order
+            for side, levels in (("buy", book._bids), ("sell", book._asks)):
+                for price, order_list in levels.items():
+                    curr = order_list.head
+                    while curr is not None:
+                        registry[curr.order_id] = OrderMetadata(market_id, side, price, curr.quantity, curr.user_id)
+                        curr = curr.next_node
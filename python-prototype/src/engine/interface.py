@@ -14,14 +14,17 @@ Responsibilities:
 - Interface bridges the gap
 """
 
-import zlib
+import logging
+from collections.abc import Callable
 from dataclasses import dataclass
-from decimal import Decimal
 from enum import Enum, auto
 from typing import Any
 
-from orderbook.economy import EconomyManager
-from orderbook.id_mapper import UserIdMapper
+from orderbook.economy import EconomyManager, format_cents
+from orderbook.id_mapper import OrderIdMapper, UserIdMapper
+
+# Hot-path output goes through the server's queue handler, off the engine thread
+logger = logging.getLogger(__name__)
 
 # --- Command Types ---
 
@@ -36,7 +39,7 @@ class EngineAction(Enum):
     GET_SNAPSHOT = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class EngineCommand:
     """
     Unified command structure for engine operations.
@@ -64,7 +67,7 @@ class EngineCommand:
     # Uses market_id field above
 
 
-@dataclass
+@dataclass(slots=True)
 class EngineResponse:
     """
     Unified response structure from engine operations.
@@ -78,7 +81,9 @@ class EngineResponse:
 # --- Translation Functions ---
 
 
-def translate_client_message(request: dict[str, Any], user_id_mapper: UserIdMapper) -> EngineCommand:
+def translate_client_message(
+    request: dict[str, Any], user_id_mapper: UserIdMapper, order_id_mapper: OrderIdMapper
+) -> EngineCommand:
     """
     Converts client JSON request into EngineCommand.
 
@@ -91,7 +96,7 @@ def translate_client_message(request: dict[str, Any], user_id_mapper: UserIdMapp
     Engine representation:
     - user_id: 1 (int)
     - price: 50 (cents as int)
-    - order_id: 123456 (stable int)
+    - order_id: 4294967296 (sequential int, see OrderIdMapper)
     - market_id: (1, 480) (tuple of ints)
     """
     req_type = request.get("type")
@@ -106,7 +111,7 @@ def translate_client_message(request: dict[str, Any], user_id_mapper: UserIdMapp
 
         # Convert order ID: accept str or int, convert to int for engine
         # Following same pattern as user_id: flexible in API, int in engine
-        order_id = _parse_order_id(request.get("id", 0))
+        order_id = _parse_order_id(request.get("id", 0), order_id_mapper.to_internal)
 
         # Parse user_id
         user_id_str = str(request["user_id"])
@@ -123,7 +128,8 @@ def translate_client_message(request: dict[str, Any], user_id_mapper: UserIdMapp
         )
 
     elif req_type == "cancel":
-        order_id = _parse_order_id(request["id"])
+        # Cancels only resolve existing IDs; an unknown ID must not add a mapping
+        order_id = _parse_order_id(request["id"], order_id_mapper.lookup)
         return EngineCommand(action=EngineAction.CANCEL_ORDER, order_id=order_id)
 
     elif req_type == "settle":
@@ -148,6 +154,10 @@ def translate_client_message(request: dict[str, Any], user_id_mapper: UserIdMapp
         raise ValueError(f"Unknown request type: {req_type}")
 
 
+def _noop(order_id: int) -> None:
+    pass
+
+
 def _parse_market_id(raw_market_id: Any, user_id_mapper: UserIdMapper) -> tuple[int, int]:
     """
     Parses market_id from various client formats into engine format (int, int).
@@ -159,17 +169,17 @@ def _parse_market_id(raw_market_id: Any, user_id_mapper: UserIdMapper) -> tuple[
     FIX: Always convert username to internal ID for engine.
     This prevents duplicate markets (eg "alice" vs "1").
     """
+    # Client sent String (iOS sends "alice_480", so check this first)
+    if type(raw_market_id) is str:
+        # Comma first so usernames containing "_" still parse ("bob_smith,480")
+        target_user, sep, minutes_str = raw_market_id.rpartition(",")
+        if not sep:
+            target_user, _, minutes_str = raw_market_id.rpartition("_")
+        minutes = int(minutes_str)
     # Clint sent Dict
-    if isinstance(raw_market_id, dict):
+    elif type(raw_market_id) is dict:
         target_user = str(raw_market_id["target_user_id"])
         minutes = int(raw_market_id["threshold_minutes"])
-    # Client sent String
-    elif isinstance(raw_market_id, str):
-        if "_" in raw_market_id:
-            target_user, minutes_str = raw_market_id.rsplit("_", 1)
-        else:
-            target_user, minutes_str = raw_market_id.split(",")
-        minutes = int(minutes_str)
     else:
         raise ValueError(f"Invalid market_id type: {type(raw_market_id)}")
 
@@ -178,16 +188,16 @@ def _parse_market_id(raw_market_id: Any, user_id_mapper: UserIdMapper) -> tuple[
     return (target_user_int, minutes)
 
 
-def _parse_order_id(raw_id: Any) -> int:
+def _parse_order_id(raw_id: Any, resolve: Callable[[str], int]) -> int:
     """
     Converts order ID from client format (string/UUID) to engine format (stable int).
 
-    Uses CRC32 for deterministic hashing across restarts.
-    Stable conversion so string IDs match the engine's integer IDs.
+    String IDs go through the persisted OrderIdMapper: one dict lookup,
+    and unlike a hash, no two client IDs can collide.
+    resolve is OrderIdMapper.to_internal for new orders, OrderIdMapper.lookup for cancels.
     """
     if isinstance(raw_id, str):
-        # Use CRC32 for a stable, deterministic integer across restarts
-        return zlib.crc32(raw_id.encode()) & 0xFFFFFFFF
+        return resolve(raw_id)
     return int(raw_id)
 
 
@@ -209,39 +219,45 @@ class EngineInterface:
         user_id_mapper: UserIdMapper,
         auditor: Any | None = None,  # SystemAuditor
         debug_mode: bool = True,
+        audit_interval: int = 100,
+        order_id_mapper: OrderIdMapper | None = None,
     ):
         self.engine = engine
         self.economy = economy
         self.user_id_mapper = user_id_mapper
+        # Mappings are released here once an order leaves the book (see _release_order_id)
+        self.order_id_mapper = order_id_mapper if order_id_mapper is not None else OrderIdMapper()
         self.auditor = auditor
         self.debug_mode = debug_mode
+        self.audit_interval = audit_interval
+        # Start one short of the interval so the first order after startup is audited (catches a bad load)
+        self._orders_since_audit = audit_interval - 1
+        self._first_unaudited_order_id: int | None = None
+        # Audit on/off is fixed at construction, so pick the step-6 hook once instead of branching per order
+        self._run_audit: Callable[[int], None] = self._sampled_audit if (debug_mode and auditor) else _noop
+
+        # EngineAction -> handler, built once so execute() is a single dict lookup
+        self._dispatch: dict[EngineAction, Callable[[EngineCommand], EngineResponse]] = {
+            EngineAction.PLACE_ORDER: self._handle_place_order,
+            EngineAction.CANCEL_ORDER: self._handle_cancel_order,
+            EngineAction.SETTLE_MARKETS: self._handle_settle,
+            EngineAction.GET_MARKETS: lambda cmd: EngineResponse(success=True, data=self._handle_get_markets()),
+            EngineAction.GET_SNAPSHOT: lambda cmd: EngineResponse(success=True, data=self._handle_get_snapshot(cmd)),
+        }
+        # (1, 480) -> "alice,480". Internal IDs never get reassigned, so entries stay valid.
+        self._market_id_strs: dict[tuple[int, int], str] = {}
 
     def execute(self, cmd: EngineCommand) -> EngineResponse:
         """
         Central dispatcher for all engine operations.
         Coordinates engine + economy + auditing.
         """
-        try:
-            if cmd.action == EngineAction.PLACE_ORDER:
-                return self._handle_place_order(cmd)
-
-            elif cmd.action == EngineAction.CANCEL_ORDER:
-                return self._handle_cancel_order(cmd)
-
-            elif cmd.action == EngineAction.SETTLE_MARKETS:
-                return self._handle_settle(cmd)
-
-            elif cmd.action == EngineAction.GET_MARKETS:
-                markets = self._handle_get_markets()
-                return EngineResponse(success=True, data=markets)
-
-            elif cmd.action == EngineAction.GET_SNAPSHOT:
-                snapshot = self._handle_get_snapshot(cmd)
-                return EngineResponse(success=True, data=snapshot)
-
-            else:
-                return EngineResponse(success=False, message=f"Unknown action: {cmd.action}")
+        handler = self._dispatch.get(cmd.action)
+        if handler is None:
+            return EngineResponse(success=False, message=f"Unknown action: {cmd.action}")
 
+        try:
+            return handler(cmd)
         except Exception as e:
             return EngineResponse(success=False, message=f"Interface error: {e}")
 
@@ -254,7 +270,7 @@ class EngineInterface:
         2. Execute matching in engine
         3. Confirm trades in economy
         4. Handle price improvement refunds
-        5. Run audit (if debug mode)
+        5. Run audit (if debug mode, every audit_interval orders)
         """
         # Validate required fields for PLACE_ORDER
         assert cmd.market_id is not None, "market_id required for PLACE_ORDER"
@@ -265,23 +281,27 @@ class EngineInterface:
         assert cmd.user_id is not None, "user_id required for PLACE_ORDER"
 
         # Convert user_id back to string for economy
+        # Prices stay in cents end to end, same unit as the economy balances
         user_id_str = self.user_id_mapper.to_external(cmd.user_id)
-        price_decimal = Decimal(cmd.price) / 100  # cents → dollars
 
         # Step 1: Lock funds for buy orders
         if cmd.side == "buy":
-            if not self.economy.attempt_order_lock(user_id_str, price_decimal, cmd.quantity):
+            if not self.economy.attempt_order_lock(user_id_str, cmd.price, cmd.quantity):
+                self._release_order_id(cmd.order_id)
+                cost_cents = cmd.price * cmd.quantity
                 return EngineResponse(
                     success=False,
-                    message=f"Insufficient funds. Need ${price_decimal * cmd.quantity:.2f}",
+                    message=f"Insufficient funds. Need ${format_cents(cost_cents)}",
                 )
 
         # Step 2: Create market if needed
-        if cmd.market_id not in self.engine._markets:
+        # One probe; the book is handed to the engine so it doesn't look the market up again
+        book = self.engine._markets.get(cmd.market_id)
+        if book is None:
             target_user_str = self.user_id_mapper.to_external(cmd.market_id[0])
             minutes = cmd.market_id[1]
             market_name = f"{target_user_str} Sleep {minutes // 60}:{minutes % 60:02d}"
-            self.engine.create_market(cmd.market_id, market_name)
+            book = self.engine.create_market(cmd.market_id, market_name)
 
         # Step 3: Execute matching
         try:
@@ -292,53 +312,68 @@ class EngineInterface:
                 quantity=cmd.quantity,
                 order_id=cmd.order_id,
                 user_id=cmd.user_id,
+                book=book,
             )
         except ValueError as e:
             # Engine rejected (e.g., market closed)
             if cmd.side == "buy":
-                self.economy.release_order_lock(user_id_str, price_decimal, cmd.quantity)
+                self.economy.release_order_lock(user_id_str, cmd.price, cmd.quantity)
+            self._release_order_id(cmd.order_id)
             return EngineResponse(success=False, message=str(e))
 
         # Step 4: Confirm trades in economy
         # FIX: Use original username string, not internal ID
         # We need consistent string key for the portfolio dictionary
-        target_user_str = self.user_id_mapper.to_external(cmd.market_id[0])
-        market_id_str = f"{target_user_str},{cmd.market_id[1]}"
-
+        market_id_str = self._market_id_str(cmd.market_id)
+
+        # Taker side of every fill is this order's user, already converted above.
+        # Only the maker's ID needs a lookup per trade.
+        # Makers the engine dropped from its registry were fully filled: forget their client IDs.
+        is_buy = cmd.side == "buy"
+        to_external = self.user_id_mapper.to_external
+        registry = self.engine._order_registry
+        release_order_id = self.order_id_mapper.release
         for trade in trades:
-            buyer_str = self.user_id_mapper.to_external(trade.buy_user_id)
-            seller_str = self.user_id_mapper.to_external(trade.sell_user_id)
-            # Convert cents to dollars (Engine uses cents, Economy uses dollars)
-            trade_price_dollars = Decimal(trade.price) / 100
+            if trade.maker_order_id not in registry:
+                release_order_id(trade.maker_order_id)
+            if is_buy:
+                buyer_str = user_id_str
+                seller_str = to_external(trade.sell_user_id)
+            else:
+                buyer_str = to_external(trade.buy_user_id)
+                seller_str = user_id_str
 
             self.economy.confirm_trade(
                 buyer_id=buyer_str,
                 seller_id=seller_str,
                 market_id=market_id_str,
-                price=trade_price_dollars,
+                price_cents=trade.price,
                 quantity=trade.quantity,
             )
 
+        # Taker filled completely on arrival: it never rests, so its ID is done too
+        self._release_order_id(cmd.order_id)
+
         # Step 5: Price Improvement: Release unused locked funds
         # If buyer got a better price than they locked for, refund the difference
         if cmd.side == "buy" and trades:
-            total_paid = sum(Decimal(t.price) / 100 * t.quantity for t in trades)
-            total_filled = sum(t.quantity for t in trades)
-            total_locked = price_decimal * total_filled
-            refund = total_locked - total_paid
+            # One pass over the fills, all in int cents
+            total_paid = total_filled = 0
+            for t in trades:
+                total_paid += t.price * t.quantity
+                total_filled += t.quantity
+            refund = cmd.price * total_filled - total_paid  # cents
 
             if refund > 0:
                 self.economy.release_order_lock(user_id_str, refund, 1)
-                if self.debug_mode:
-                    print(f"[Interface] Price improvement refund: ${refund:.2f}")
+                logger.debug("[Interface] Price improvement refund: $%s", format_cents(refund))
 
         # Step 6: Audit (if enabled)
-        if self.debug_mode and self.auditor:
-            try:
-                self.auditor.run_full_audit()
-            except ValueError as e:
-                print(f"CRITICAL: Audit failed after order {cmd.order_id}!")
-                return EngineResponse(success=False, message=f"Audit failure: {e}")
+        try:
+            self._run_audit(cmd.order_id)
+        except ValueError as e:
+            logger.error("CRITICAL: Audit failed: %s", e)
+            return EngineResponse(success=False, message=f"Audit failure: {e}")
 
         return EngineResponse(
             success=True,
@@ -346,6 +381,45 @@ class EngineInterface:
             message=f"Order placed. {len(trades)} trades executed.",
         )
 
+    def _sampled_audit(self, order_id: int) -> None:
+        """
+        Full audit scans every market/account, so only run it every audit_interval orders.
+        A failure names every order since the last audit: any of them may have caused it,
+        not just the one that happened to trigger the check.
+        """
+        if self._first_unaudited_order_id is None:
+            self._first_unaudited_order_id = order_id
+        self._orders_since_audit += 1
+        if self._orders_since_audit >= self.audit_interval:
+            first_order_id = self._first_unaudited_order_id
+            self._orders_since_audit = 0
+            self._first_unaudited_order_id = None
+            assert self.auditor is not None  # only bound when an auditor was given
+            try:
+                self.auditor.run_full_audit()
+            except ValueError as e:
+                raise ValueError(f"{e} (in orders {first_order_id}..{order_id} since the last audit)") from e
+
+    def _release_order_id(self, order_id: int) -> None:
+        """
+        Drop the client ID mapping of an order that is not resting on any book.
+        Mappings live exactly as long as the engine's registry entry.
+        """
+        if order_id not in self.engine._order_registry:
+            self.order_id_mapper.release(order_id)
+
+    def _market_id_str(self, market_id: tuple[int, int]) -> str:
+        """
+        Economy-side market key for an engine market_id: (1, 480) -> "alice,480".
+        Built once per market instead of on every order.
+        """
+        market_id_str = self._market_id_strs.get(market_id)
+        if market_id_str is None:
+            target_user_str = self.user_id_mapper.to_external(market_id[0])
+            market_id_str = f"{target_user_str},{market_id[1]}"
+            self._market_id_strs[market_id] = market_id_str
+        return market_id_str
+
     def _handle_cancel_order(self, cmd: EngineCommand) -> EngineResponse:
         """
         Cancel order and release locked funds if buy order.
@@ -363,9 +437,9 @@ class EngineInterface:
         # NOTE: We need to know WHO placed the order to refund them.
         if meta.side == "buy":
             user_id_str = self.user_id_mapper.to_external(meta.user_id)
-            # Convert cents (Engine) to dollars (Economy)
-            price_decimal = Decimal(meta.price) / 100
-            self.economy.release_order_lock(user_id_str, price_decimal, meta.quantity)
+            self.economy.release_order_lock(user_id_str, meta.price, meta.quantity)
+
+        self.order_id_mapper.release(cmd.order_id)
 
         return EngineResponse(
             success=True,
@@ -384,35 +458,22 @@ class EngineInterface:
         all_trades = []
         markets_settled = 0
 
-        # Find and settle all markets for this user
-        for market_id in list(self.engine._markets.keys()):
-            # Compare internal IDs
-            if market_id[0] == cmd.target_user_id:
-                threshold = market_id[1]
-                # Terminal price: 1 if they met/exceeded threshold, 0 if not
-                terminal_price = 1 if cmd.actual_screentime_minutes >= threshold else 0
-
-                trades = self.engine._markets[market_id].settle_market(terminal_price)
+        # Find and settle all markets for this user (owner index, internal IDs)
+        to_external = self.user_id_mapper.to_external
+        for market_id in self.engine._markets_by_user.get(cmd.target_user_id, ()):
+            threshold = market_id[1]
+            # Terminal price: 1 if they met/exceeded threshold, 0 if not
+            terminal_price = 1 if cmd.actual_screentime_minutes >= threshold else 0
 
-                # FIX: Convert internal ID back to username string for economy
-                # Confirm trades in economy
-                target_user_str = self.user_id_mapper.to_external(market_id[0])
-                market_id_str = f"{target_user_str},{market_id[1]}"
+            trades = self.engine._markets[market_id].settle_market(terminal_price)
 
-                for trade in trades:
-                    buyer_str = self.user_id_mapper.to_external(trade.buy_user_id)
-                    seller_str = self.user_id_mapper.to_external(trade.sell_user_id)
+            # FIX: Convert internal ID back to username string for economy
+            # Confirm trades in economy, one batch per market (all at terminal_price)
+            fills = [(to_external(t.buy_user_id), to_external(t.sell_user_id), t.quantity) for t in trades]
+            self.economy.confirm_settlement(self._market_id_str(market_id), terminal_price, fills)
 
-                    self.economy.confirm_trade(
-                        buyer_id=buyer_str,
-                        seller_id=seller_str,
-                        market_id=market_id_str,
-                        price=Decimal(trade.price) / 100,
-                        quantity=trade.quantity,
-                    )
-
-                all_trades.extend(trades)
-                markets_settled += 1
+            all_trades.extend(trades)
+            markets_settled += 1
 
         return EngineResponse(
             success=True,
@@ -431,17 +492,13 @@ class EngineInterface:
 
         for m in raw_markets:
             try:
-                # Parse market ID and convert internal ID back to username
-                raw_id = str(m["id"])
-                sep = "," if "," in raw_id else "_"
-                internal_id_str, minutes = raw_id.split(sep, 1)
-
-                # CONVERT BACK: Int(1) -> Str("alice")
-                real_username = self.user_id_mapper.to_external(int(internal_id_str))
+                # CONVERT BACK: (1, 480) -> "alice,480"
+                # Engine already gives the int parts, so no need to re-parse m["id"]
+                market_id_str = self._market_id_str((m["target_user"], m["threshold_minutes"]))
 
                 # Rebuild with real username
                 clean_m = m.copy()
-                clean_m["id"] = f"{real_username},{minutes}"
+                clean_m["id"] = market_id_str
                 clean_markets.append(clean_m)
 
             except Exception:
@@ -3,10 +3,14 @@
 # Total system wealth (Available + Locked) == Total Minted
 # MatchingEngine registry == OrderBook internal quantities
 
-from decimal import Decimal
+import logging
 
-from engine.engine import MatchingEngine
-from orderbook.economy import EconomyManager
+from engine.engine import MarketId, MatchingEngine
+from orderbook.economy import EconomyManager, format_cents
+
+# Pass lines are debug-level: through the server's queue handler, off the engine thread,
+# and dropped entirely outside debug mode. Failures are logged at error.
+logger = logging.getLogger(__name__)
 
 
 class SystemAuditor:
@@ -19,50 +23,53 @@ class SystemAuditor:
         Runs all invariant checks.
         If fail, system state is corrupted.
         """
-        print("\n--- STARTING SYSTEM AUDIT ---")
+        logger.debug("--- STARTING SYSTEM AUDIT ---")
 
         try:
             self._audit_positions()
             self._audit_cash()
             self._audit_registry()
-            print("--- AUDIT COMPLETE: SYSTEM IS SOUND ---\n")
+            logger.debug("--- AUDIT COMPLETE: SYSTEM IS SOUND ---")
         except ValueError as e:
             # In a real exchange, this would trigger a 'Circuit Breaker'
             # and halt all trading immediately.
-            print(f"!!! CRITICAL AUDIT FAILURE: {e}")
+            logger.error("!!! CRITICAL AUDIT FAILURE: %s", e)
             raise
 
     def _audit_positions(self) -> None:
         """Total net quantity in every market must sum to zero (Conservation of Contracts)."""
         for market_id, book in self.engine._markets.items():
             # Sum of all user positions (Longs are +, Shorts are -)
+            # Re-summed on purpose: a running total fed by the same fill updates would always be zero
             total_net = sum(book._positions.values())
             if total_net != 0:
                 raise ValueError(f"Market {market_id} unbalanced! Net: {total_net}")
-        print("[✓] Market Positions Balanced: Net Zero.")
+        logger.debug("[✓] Market Positions Balanced: Net Zero.")
 
     def _audit_cash(self) -> None:
         """Available + Locked must equal total wealth (Conservation of Cash)."""
-        system_total = Decimal("0.00")
+        system_total = 0
 
         for user_id, account in self.economy.accounts.items():
             system_total += account.balance_available + account.balance_locked
 
         # Optimization: In the future, compare this to a 'Total Deposits'
         # variable in EconomyManager to ensure no money was 'leaked' or 'minted'.
-        print(f"[✓] Cash Audit: Total System Liquidity is ${system_total:.2f}")
+        logger.debug("[✓] Cash Audit: Total System Liquidity is $%s", format_cents(system_total))
 
     def _audit_registry(self) -> None:
         """The Registry 'Map' must perfectly match the OrderBook 'Reality'."""
-        for market_id, book in self.engine._markets.items():
-            # Actual contracts resting in the book's internal lists
-            book_volume = sum(order.quantity for order in book._orders.values())
+        # What the global registry (used for cancellations) thinks is there
+        # One pass over the registry, bucketed by market (not one full scan per market)
+        registry_volumes: dict[MarketId, int] = {}
+        for meta in self.engine._order_registry.values():
+            registry_volumes[meta.market_id] = registry_volumes.get(meta.market_id, 0) + meta.quantity
 
-            # What the global registry (used for cancellations) thinks is there
-            registry_volume = sum(
-                meta.quantity for meta in self.engine._order_registry.values() if meta.market_id == market_id
-            )
+        for market_id, book in self.engine._markets.items():
+            # Actual contracts resting in the book (running total, O(1))
+            book_volume = book._resting_qty
+            registry_volume = registry_volumes.get(market_id, 0)
 
             if book_volume != registry_volume:
                 raise ValueError(f"Registry mismatch in {market_id}! Book: {book_volume}, Registry: {registry_volume}")
-        print("[✓] Registry Integrity: Global Map matches Local Books.")
+        logger.debug("[✓] Registry Integrity: Global Map matches Local Books.")
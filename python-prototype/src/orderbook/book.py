@@ -1,5 +1,6 @@
 import heapq
 import time
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 
 from .linked_list import OrderList
@@ -8,7 +9,7 @@ from .trade import Trade
 from .types import PriceLevel
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderBook:
     # Find order
     # Order ID -> OrderNode
@@ -21,7 +22,8 @@ class OrderBook:
     _asks: dict[int, OrderList] = field(default_factory=dict)
 
     # Sorted prices
-    # Heaps with lazy deletion
+    # Heaps with lazy deletion: a level emptied by a cancel leaves its price behind,
+    # skipped when it reaches the top (see _compact_heap for the size bound)
     # _bids_heap stores -price since heapq is a Min-Heap
     _bids_heap: list[int] = field(default_factory=list)
     _asks_heap: list[int] = field(default_factory=list)
@@ -29,9 +31,27 @@ class OrderBook:
     # Track net positions per user
     _positions: dict[int, int] = field(default_factory=dict)  # user_id -> net_qty
 
+    # Running total kept in step with _orders, so the auditor
+    # can check resting volume in O(1) instead of re-summing the whole book
+    _resting_qty: int = 0
+
     # Track if market is open
     active: bool = True
 
+    # Bumped on every mutation, so callers can cache derived views (e.g. engine dump)
+    _version: int = 0
+
+    # Top of book as of _best_version; re-read from the levels only after a mutation
+    _best_version: int = -1
+    _best_bid: int | None = None
+    _best_ask: int | None = None
+
+    # Last snapshot() result, tagged with the _version it was built from
+    _snapshot_cache: tuple[int, dict[str, list[PriceLevel]]] | None = None
+
+    # Spent OrderNodes (filled or cancelled), reused by _add_to_book instead of allocating
+    _node_pool: list[OrderNode] = field(default_factory=list)
+
     def process_order(
         self,
         side: str,
@@ -50,179 +70,229 @@ class OrderBook:
             # raise exception or return error
             raise ValueError("Market is closed.")
 
-        trades = []
+        # Side is resolved once; everything below works on the level maps and their heaps
+        if side == "buy":
+            # Buyers match against the lowest ask, rest on bids
+            is_buy = True
+            same_levels, same_heap = self._bids, self._bids_heap
+            opp_levels, opp_heap = self._asks, self._asks_heap
+        elif side == "sell":
+            # Sellers match against the highest bid, rest on asks
+            is_buy = False
+            same_levels, same_heap = self._asks, self._asks_heap
+            opp_levels, opp_heap = self._bids, self._bids_heap
+        else:
+            raise ValueError(f"Invalid side: {side!r}")
+
+        self._version += 1
+        trades: list[Trade] = []
         remaining_qty = quantity
+        if opp_heap:
+            remaining_qty = self._match(is_buy, opp_levels, opp_heap, price, quantity, order_id, user_id, trades)
 
-        if side == "buy":
-            # While there is qty to buy and there are sellers
-            while remaining_qty > 0 and self._asks_heap:
-                best_ask_price = self._asks_heap[0]
-
-                # Does Buy Price >= Best Sell Price?
-                if price < best_ask_price:
-                    break
-
-                # Get the queue of order at this best price
-                # lazy deletion here?
-                if best_ask_price not in self._asks:
-                    heapq.heappop(self._asks_heap)
-                    continue
-
-                best_ask_queue = self._asks[best_ask_price]
-
-                # Go thru queue (Time Priority)
-                # Head is oldest order
-                while remaining_qty > 0 and best_ask_queue.head:
-                    maker_order = best_ask_queue.head
-
-                    # Calculate trade size
-                    trade_qty = min(remaining_qty, maker_order.quantity)
-
-                    # Execute Trade
-                    trades.append(
-                        Trade(
-                            buy_order_id=order_id,
-                            sell_order_id=maker_order.order_id,
-                            price=best_ask_price,  # Trade at Maker's price
-                            quantity=trade_qty,
-                            maker_order_id=maker_order.order_id,
-                            taker_order_id=order_id,
-                            buy_user_id=user_id,  # taker is buyer
-                            sell_user_id=maker_order.user_id,  # maker is seller
-                        )
-                    )
+        # If there is anything left, put it on the book
+        # Resting side's heap key is -price for bids, price for asks
+        if remaining_qty > 0:
+            self._add_to_book(same_levels, same_heap, -1 if is_buy else 1, price, remaining_qty, order_id, user_id)
 
-                    # Update positions
-                    self._positions[user_id] = self._positions.get(user_id, 0) + trade_qty
-                    self._positions[maker_order.user_id] = self._positions.get(maker_order.user_id, 0) - trade_qty
+        return trades
 
-                    # Update quantities
-                    remaining_qty -= trade_qty
-                    maker_order.quantity -= trade_qty
-                    best_ask_queue.total_volume -= trade_qty
+    def _match(
+        self,
+        is_buy: bool,
+        levels: dict[int, OrderList],
+        heap: list[int],
+        price: int,
+        remaining_qty: int,
+        order_id: int,
+        user_id: int,
+        trades: list[Trade],
+    ) -> int:
+        """
+        Fills the taker against the opposite side's levels, best price first.
+        Shared by buys (asks, heap of price) and sells (bids, heap of -price).
+        Appends fills to trades and returns the unfilled quantity.
+        """
+        # Hot loop: bind everything touched per fill to locals once
+        positions = self._positions
+        orders = self._orders
+        recycle_node = self._node_pool.append
+        append_trade = trades.append
+        start_qty = remaining_qty
+        # +1 for buys, -1 for sells: the cross test becomes one subtraction and one compare,
+        # and it is also the opposite heap's key sign (asks hold price, bids hold -price)
+        sign = 1 if is_buy else -1
+        heappop = heapq.heappop
+
+        # While there is qty left and there are makers
+        while remaining_qty > 0 and heap:
+            best_price = heap[0] * sign
+
+            # Crossed? Buy needs price >= best ask, sell needs price <= best bid
+            if (price - best_price) * sign < 0:
+                break
+
+            # Get the queue of orders at this best price
+            best_queue = levels.get(best_price)
+            if best_queue is None:
+                # Lazy deletion: level was emptied by a cancel
+                heappop(heap)
+                continue
 
-                    # If maker order is filled, remove it
-                    if maker_order.quantity == 0:
-                        best_ask_queue.remove(maker_order)
-                        del self._orders[maker_order.order_id]
+            # Go thru queue (Time Priority)
+            # Head is oldest order
+            while remaining_qty > 0 and best_queue.head:
+                maker_order = best_queue.head
 
-                # If the queue is empty, remove it
-                if best_ask_queue.count == 0:
-                    del self._asks[best_ask_price]
-                    heapq.heappop(self._asks_heap)
+                # Calculate trade size
+                trade_qty = min(remaining_qty, maker_order.quantity)
 
-        elif side == "sell":
-            # Sell logic checks Bids
-
-            # Check against Bids
-            while remaining_qty > 0 and self._bids_heap:
-                # Bids are stored as negative numbers
-                # Flip it back
-                best_bid_price = -self._bids_heap[0]
-
-                # Check Spread
-                # No deal if Sell Price > Best Bid
-                if price > best_bid_price:
-                    break
-
-                # Lazy deletion check
-                # Earlier we marked the node for deletion and now we're doing it.
-                if best_bid_price not in self._bids:
-                    heapq.heappop(self._bids_heap)
-                    continue
-
-                best_bid_queue = self._bids[best_bid_price]
-
-                # Go thru Queue (Time Priority)
-                while remaining_qty > 0 and best_bid_queue.head:
-                    maker_order = best_bid_queue.head  # This is "buy" order
-
-                    trade_qty = min(remaining_qty, maker_order.quantity)
-
-                    # Trade Receipt
-                    # Arguments are flipped
-                    trades.append(
-                        Trade(
-                            buy_order_id=maker_order.order_id,  # Maker is the Buyer
-                            sell_order_id=order_id,  # We (Taker) are the Seller
-                            price=best_bid_price,  # Trade at Maker's price
-                            quantity=trade_qty,
-                            maker_order_id=maker_order.order_id,
-                            taker_order_id=order_id,
-                            buy_user_id=maker_order.user_id,  # maker is buyer
-                            sell_user_id=user_id,  # taker is seller
-                        )
+                # Execute Trade at Maker's price
+                if is_buy:
+                    buyer_order_id, seller_order_id = order_id, maker_order.order_id
+                    buyer_id, seller_id = user_id, maker_order.user_id
+                else:
+                    buyer_order_id, seller_order_id = maker_order.order_id, order_id
+                    buyer_id, seller_id = maker_order.user_id, user_id
+
+                # Positional args in Trade field order (keyword binding doubles the construction cost):
+                # buy/sell order ids, price, quantity, maker/taker order ids, buy/sell user ids
+                append_trade(
+                    Trade(
+                        buyer_order_id,
+                        seller_order_id,
+                        best_price,
+                        trade_qty,
+                        maker_order.order_id,
+                        order_id,
+                        buyer_id,
+                        seller_id,
                     )
+                )
 
-                    # Update positions
-                    self._positions[maker_order.user_id] = self._positions.get(maker_order.user_id, 0) + trade_qty
-                    self._positions[user_id] = self._positions.get(user_id, 0) - trade_qty
+                # Update positions
+                positions[buyer_id] = positions.get(buyer_id, 0) + trade_qty
+                positions[seller_id] = positions.get(seller_id, 0) - trade_qty
 
-                    remaining_qty -= trade_qty
-                    maker_order.quantity -= trade_qty
-                    best_bid_queue.total_volume -= trade_qty
+                # Update quantities
+                remaining_qty -= trade_qty
+                maker_order.quantity -= trade_qty
+                best_queue.total_volume -= trade_qty
 
-                    if maker_order.quantity == 0:
-                        best_bid_queue.remove(maker_order)
-                        del self._orders[maker_order.order_id]
+                # If maker order is filled, remove it
+                if maker_order.quantity == 0:
+                    best_queue.remove_head(maker_order)
+                    del orders[maker_order.order_id]
+                    recycle_node(maker_order)
 
-                if best_bid_queue.count == 0:
-                    del self._bids[best_bid_price]
-                    heapq.heappop(self._bids_heap)
+            # If the queue is empty, remove the level (and its price, still at the top of the heap)
+            if best_queue.count == 0:
+                del levels[best_price]
+                heappop(heap)
 
-        # If there is anything left, put it on the book
-        if remaining_qty > 0:
-            self._add_to_book(side, price, remaining_qty, order_id, user_id)
-
-        return trades
+        # Everything filled came out of resting makers
+        self._resting_qty -= start_qty - remaining_qty
+        return remaining_qty
 
-    def _add_to_book(self, side: str, price: int, quantity: int, order_id: int, user_id: int) -> None:
+    def _add_to_book(
+        self,
+        levels: dict[int, OrderList],
+        heap: list[int],
+        key_sign: int,
+        price: int,
+        quantity: int,
+        order_id: int,
+        user_id: int,
+    ) -> None:
         """
-        Places a resting order in the book
+        Places a resting order on the given side's levels (self._bids or self._asks)
+        key_sign is -1 for bids (heap holds -price), 1 for asks
         Doesn't match orders
         """
         # Gatekeeper
         if not self.active:
             raise ValueError("Market is closed.")
 
-        # Create order node
-        order = OrderNode(
-            order_id=order_id,
-            user_id=user_id,
-            price=price,
-            quantity=quantity,
-            timestamp=time.time(),
-        )
+        self._version += 1
+
+        # Create order node (recycled when one is free; list links are already cleared)
+        if self._node_pool:
+            order = self._node_pool.pop()
+            order.order_id = order_id
+            order.user_id = user_id
+            order.price = price
+            order.quantity = quantity
+            order.timestamp = time.time()
+        else:
+            order = OrderNode(order_id, user_id, price, quantity, time.time())
 
         # Store in global map
         # Find the slot called "order_id" in _orders dictionary and put "order" there.
         self._orders[order_id] = order
+        self._resting_qty += quantity
+
+        # Do we already have a queue for this price?
+        order_list = levels.get(price)
+        if order_list is None:
+            # If no, create a new empty queue
+            order_list = levels[price] = OrderList()
+            # Tell Heap about this new price level
+            # Heap: Price priority
+            heapq.heappush(heap, price * key_sign)
+        # Place order at the end of queue
+        # Queue: Time priority
+        order_list.append(order)
 
-        # Add to buy or sell side
+    def add_order(self, side: str, price: int, quantity: int, order_id: int, user_id: int) -> None:
+        """
+        Public method to add a resting order to the book without matching.
+        For matching orders, use process_order() instead.
+        """
         if side == "buy":
-            # Do we already have a queue for this price?
-            if price not in self._bids:
-                # If no, create a new empty queue
-                self._bids[price] = OrderList()
-                # Tell Heap about this new price level
-                # Heap: Price priority
-                heapq.heappush(self._bids_heap, -price)  # Max-Heap
-            # Place order at the end of queue
-            # Queue: Time priority
-            self._bids[price].append(order)
+            self._add_to_book(self._bids, self._bids_heap, -1, price, quantity, order_id, user_id)
+        elif side == "sell":
+            self._add_to_book(self._asks, self._asks_heap, 1, price, quantity, order_id, user_id)
+        else:
+            raise ValueError(f"Invalid side: {side!r}")
 
+    def load_orders(self, side: str, rows: Iterable[tuple[int, int, int, int, float]]) -> None:
+        """
+        Bulk-restores saved resting orders without matching.
+        rows: (order_id, user_id, price, quantity, timestamp), in saved FIFO order.
+        Keeps the saved timestamps and bumps the version once for the whole batch.
+        """
+        if side == "buy":
+            levels, heap, key_sign = self._bids, self._bids_heap, -1
         elif side == "sell":
-            if price not in self._asks:
-                self._asks[price] = OrderList()
-                heapq.heappush(self._asks_heap, price)
-            self._asks[price].append(order)
+            levels, heap, key_sign = self._asks, self._asks_heap, 1
+        else:
+            raise ValueError(f"Invalid side: {side!r}")
 
-    def add_order(self, side: str, price: int, quantity: int, order_id: int, user_id: int) -> None:
+        if not self.active:
+            raise ValueError("Market is closed.")
+
+        self._version += 1
+        orders = self._orders
+        for order_id, user_id, price, quantity, timestamp in rows:
+            order = OrderNode(order_id, user_id, price, quantity, timestamp)
+            orders[order_id] = order
+            self._resting_qty += quantity
+
+            order_list = levels.get(price)
+            if order_list is None:
+                order_list = levels[price] = OrderList()
+            order_list.append(order)
+
+        # One heapify for the whole batch instead of a push per new level
+        self._compact_heap(levels, heap, key_sign)
+
+    def _compact_heap(self, levels: dict[int, OrderList], heap: list[int], key_sign: int) -> None:
         """
-        Public method to add a resting order to the book without matching.
-        For matching orders, use process_order() instead.
+        Rebuilds a side's heap from its live levels, dropping lazily-deleted prices.
+        In place, so the list bound in process_order stays the same object.
         """
-        self._add_to_book(side, price, quantity, order_id, user_id)
+        heap[:] = [price * key_sign for price in levels]
+        heapq.heapify(heap)
 
     def cancel_order(self, order_id: int) -> None:
         """
@@ -233,101 +303,118 @@ class OrderBook:
         if order_id not in self._orders:
             return
 
+        self._version += 1
         order = self._orders[order_id]
         price = order.price
 
         # Remove from the Linked List
         if price in self._bids:
-            self._bids[price].remove(order)
+            levels, heap, key_sign = self._bids, self._bids_heap, -1
+        else:
+            levels, heap, key_sign = self._asks, self._asks_heap, 1
+
+        order_list = levels.get(price)
+        if order_list is not None:
+            order_list.remove(order)
             # If level is empty, delete the list from the dict
             # Leave the price in the heap for lazy deletion
-            if self._bids[price].count == 0:
-                del self._bids[price]
-
-        elif price in self._asks:
-            self._asks[price].remove(order)
-            if self._asks[price].count == 0:
-                del self._asks[price]
+            if order_list.count == 0:
+                del levels[price]
+                # Re-quoting at an emptied price pushes it again, so stale entries can pile up
+                # behind the top; rebuild once they outnumber the live levels (amortized O(1))
+                if len(heap) > 2 * len(levels) + 32:
+                    self._compact_heap(levels, heap, key_sign)
 
         # Remove from global map
         del self._orders[order_id]
+        self._resting_qty -= order.quantity
+        self._node_pool.append(order)
 
     def get_best_bid(self) -> int | None:
         """
         Returns the highest buy price.
-        Lazy clean up ghost prices from the heap.
+        Cached until the next mutation, so polling top of book is an attribute read.
         """
-        while self._bids_heap:
-            # Bids were stored as negatives, so flipping it back
-            best_price_neg = self._bids_heap[0]
-            best_price = -best_price_neg
-
-            if best_price in self._bids:
-                return best_price
-            else:
-                # This price level is now empty, so pop and retry
-                heapq.heappop(self._bids_heap)
-        return None
+        if self._best_version != self._version:
+            self._refresh_best()
+        return self._best_bid
 
     def get_best_ask(self) -> int | None:
         """
         Returns the lowest sell price.
         """
-        while self._asks_heap:
-            best_price = self._asks_heap[0]
-
-            if best_price in self._asks:
+        if self._best_version != self._version:
+            self._refresh_best()
+        return self._best_ask
+
+    def _refresh_best(self) -> None:
+        self._best_bid = self._peek_best(self._bids, self._bids_heap, -1)
+        self._best_ask = self._peek_best(self._asks, self._asks_heap, 1)
+        self._best_version = self._version
+
+    @staticmethod
+    def _peek_best(levels: dict[int, OrderList], heap: list[int], key_sign: int) -> int | None:
+        """Top live price of one side; lazily pops prices whose level is gone."""
+        while heap:
+            best_price = heap[0] * key_sign
+            if best_price in levels:
                 return best_price
-            else:
-                heapq.heappop(self._asks_heap)
+            # This price level is now empty, so pop and retry
+            heapq.heappop(heap)
         return None
 
     def snapshot(self) -> dict[str, list[PriceLevel]]:
         """
         Returns a snapshot of the current order book as lists of price levels.
         Bids are sorted descending by price, asks ascending.
+        Reused until the book changes, so treat the result as read-only.
         """
-        bids: list[PriceLevel] = []
-        for price, order_list in sorted(self._bids.items(), reverse=True):
-            bids.append(
-                {
-                    "price": price,
-                    "volume": order_list.total_volume,
-                    "count": order_list.count,
-                }
-            )
+        cached = self._snapshot_cache
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
 
-        asks: list[PriceLevel] = []
-        for price, order_list in sorted(self._asks.items()):
-            asks.append(
-                {
-                    "price": price,
-                    "volume": order_list.total_volume,
-                    "count": order_list.count,
-                }
-            )
+        # Each row comes from the level's running totals, so no order lists are walked.
+        bids = [level.as_price_level(price) for price, level in sorted(self._bids.items(), reverse=True)]
+        asks = [level.as_price_level(price) for price, level in sorted(self._asks.items())]
 
-        return {"bids": bids, "asks": asks}
+        snapshot = {"bids": bids, "asks": asks}
+        self._snapshot_cache = (self._version, snapshot)
+        return snapshot
 
     SYSTEM_USER_ID = 0  # Reserved system account
 
-    def settle_market(self, terminal_price: int) -> list[Trade]:
+    def settle_market(self, terminal_price: int, out: list[Trade] | None = None) -> list[Trade]:
         """
         Settle entire market at terminal_price (0 or 1).
         Cancels all orders and settles all positions.
+        Synthetic trades are appended to `out` when given (and it is returned),
+        so callers settling many markets can collect them in one list.
         """
         self.active = False
+        self._version += 1
         print(f"DEBUG: Market is now CLOSED (Active={self.active})")
 
-        trades: list[Trade] = []
+        trades: list[Trade] = [] if out is None else out
 
         # Cancel all resting orders
-        orders_to_cancel = list(self._orders.keys())
-        for old in orders_to_cancel:
-            self.cancel_order(old)
+        # Market never trades again, so drop everything at once instead of unlinking order by order
+        self._orders.clear()
+        self._bids.clear()
+        self._asks.clear()
+        self._bids_heap.clear()
+        self._asks_heap.clear()
+        self._resting_qty = 0
+        # Closed for good, nothing will reuse the spent nodes
+        self._node_pool.clear()
 
         # Settle positions
-        for user_id, net_qty in self._positions.items():
+        positions = self._positions
+        if not positions:
+            # Nobody ever traded here: nothing to settle
+            return trades
+
+        append_trade = trades.append
+        for user_id, net_qty in positions.items():
             if net_qty == 0:
                 continue
 
@@ -345,7 +432,7 @@ class OrderBook:
                 else:
                     buy_user, sell_user = user_id, self.SYSTEM_USER_ID
 
-            trades.append(
+            append_trade(
                 Trade(
                     buy_order_id=-1,
                     sell_order_id=-1,
@@ -358,6 +445,6 @@ class OrderBook:
                 )
             )
 
-            self._positions[user_id] = 0
+            positions[user_id] = 0
 
         return trades
@@ -1,3 +1,4 @@
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -191,7 +192,7 @@ class MatchingEngine:
         markets_data: dict[str, Any] = {}
 
         # Helper
-        def serialize_orders(orders_map: dict[int, Any], side_label: str) -> list[dict[str, Any]]:
+        def serialize_orders(orders_map: Mapping[int, Any], side_label: str) -> list[dict[str, Any]]:
             serialized_list: list[dict[str, Any]] = []
 
             # orders_map is {price: OrderNode}
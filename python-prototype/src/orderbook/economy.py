@@ -2,16 +2,39 @@ from dataclasses import dataclass, field
 from decimal import Decimal
 from typing import Any
 
-STEPS_REWARD_RATE = Decimal("0.01")  # Credits per step
-DOOMSCROLL_TAX_RATE = Decimal("5.00")  # Credits burned per hour
+# Balances are int cents end to end; Decimal is only used for average entry prices.
+STEPS_REWARD_CENTS = 1  # Cents per step
+DOOMSCROLL_TAX_CENTS = 500  # Cents burned per hour
 
+# Decimal is immutable, so one shared zero serves every flat/default position
+_ZERO = Decimal("0.00")
 
-@dataclass
+
+def _from_cents(cents: int) -> Decimal:
+    """Engine cents -> dollar Decimal with 2 places (6000 -> 60.00)."""
+    return Decimal(cents).scaleb(-2)
+
+
+def _to_cents(amount: str) -> int:
+    """Dollar string -> int cents ("60.00" -> 6000)."""
+    if amount == "0.00":
+        return 0  # Most locked balances; skip the Decimal parse
+    return int(Decimal(amount).scaleb(2))
+
+
+def format_cents(cents: int) -> str:
+    """Int cents -> dollar string with 2 places (6000 -> "60.00")."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+@dataclass(slots=True)
 class Position:
     quantity: int = 0
     # Cost Basis
     # Average entry price in dollars/cents (Decimal for precision)
-    average_entry_price: Decimal = field(default_factory=lambda: Decimal("0.00"))
+    average_entry_price: Decimal = _ZERO
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -20,18 +43,17 @@ class Position:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Account:
     user_id: str
-    # Total equity = available + locked
-    balance_available: Decimal = field(default_factory=lambda: Decimal("0.00"))
-    balance_locked: Decimal = field(default_factory=lambda: Decimal("0.00"))  # Money in active buy orders
+    # Total equity = available + locked, all in cents
+    balance_available: int = 0
+    balance_locked: int = 0  # Money in active buy orders
 
     # Track shares: Key=MarketID (eg "alice,480"), Value=Quantity
     portfolio: dict[str, Position] = field(default_factory=dict)
 
-    def total_equity(self) -> Decimal:
-        # result: Decimal = self.balance_available + self.balance_locked
+    def total_equity(self) -> int:
         return self.balance_available + self.balance_locked
 
 
@@ -40,45 +62,45 @@ class EconomyManager:
         self.accounts: dict[str, Account] = {}
 
     def get_account(self, user_id: str) -> Account:
-        if user_id not in self.accounts:
-            self.accounts[user_id] = Account(user_id=user_id)
-        return self.accounts[user_id]
-
-    def deposit(self, user_id: str, amount: Decimal) -> None:
-        """Deposit credits to a user's available balance (for testing/admin)."""
+        # Single lookup on the common path (account already exists)
+        account = self.accounts.get(user_id)
+        if account is None:
+            account = self.accounts[user_id] = Account(user_id=user_id)
+        return account
+
+    def deposit(self, user_id: str, amount_cents: int) -> None:
+        """Deposit credits (in cents) to a user's available balance (for testing/admin)."""
         account = self.get_account(user_id)
-        account.balance_available += amount
+        account.balance_available += amount_cents
 
     # Game Mechanics (Mint/Burn)
 
-    def process_proof_of_walk(self, user_id: str, steps: int) -> Decimal:
+    def process_proof_of_walk(self, user_id: str, steps: int) -> int:
         """
         Mints new credits based on walking.
-        Returns the amount minted.
+        Returns the amount minted, in cents.
         """
         account = self.get_account(user_id)
-        reward = Decimal(steps) * STEPS_REWARD_RATE
+        reward = steps * STEPS_REWARD_CENTS
         account.balance_available += reward
         return reward
         # print(f"User {user_id} walked {steps} steps. Minted {reward} credits.")
 
-    def process_doomscroll_burn(self, user_id: str, minutes: int) -> Decimal:
+    def process_doomscroll_burn(self, user_id: str, minutes: int) -> int:
         """
         Burns credits based on screen time.
-        Returns the amount burned.
+        Returns the amount burned, in cents.
         """
         account = self.get_account(user_id)
-        # Calculate tax: (minutes / 60) * hourly_rate
-        tax = (Decimal(minutes) / Decimal(60)) * DOOMSCROLL_TAX_RATE
-
-        tax = tax.quantize(Decimal("0.01"))  # Rounds to 2 decimal places.
+        # Calculate tax: (minutes / 60) * hourly_rate, rounded to the nearest cent
+        tax = (minutes * DOOMSCROLL_TAX_CENTS + 30) // 60
 
         # No debt: Floor at zero.
         if account.balance_available >= tax:
             account.balance_available -= tax
         else:
             tax = account.balance_available  # Burned amount is whatever was left
-            account.balance_available = Decimal("0.00")
+            account.balance_available = 0
             # Can trigger Bankrupt state in future
 
         # print(f"User {user_id} doomscrolled {minutes} mins. Burned {tax} credits.")
@@ -86,14 +108,16 @@ class EconomyManager:
 
     # Trading logic
 
-    def attempt_order_lock(self, user_id: str, price: Decimal, quantity: int) -> bool:
+    # Prices come in as engine cents, same unit as balances, so cost is plain int math.
+
+    def attempt_order_lock(self, user_id: str, price_cents: int, quantity: int) -> bool:
         """
         Called before a buy order is sent to matching engine.
         Sellers do not lock cash (they lock shares), so this is only for buyers.
         Returns True if funds were successfully locked.
         """
         account = self.get_account(user_id)
-        cost = price * Decimal(quantity)
+        cost = price_cents * quantity
 
         if account.balance_available >= cost:
             account.balance_available -= cost
@@ -101,45 +125,48 @@ class EconomyManager:
             return True
         return False
 
-    def release_order_lock(self, user_id: str, price: Decimal, quantity: int) -> None:
+    def release_order_lock(self, user_id: str, price_cents: int, quantity: int) -> None:
         """
         Called if a buy order is cancelled or expires.
         Returns funds from locked to available.
         """
         account = self.get_account(user_id)
-        cost = price * Decimal(quantity)
+        cost = price_cents * quantity
 
         # Prevent negative locked balance
         if account.balance_locked >= cost:
             account.balance_locked -= cost
             account.balance_available += cost
 
-    def _update_position(self, user_id: str, market_id: str, change_qty: int, price: Decimal) -> None:
+    def _update_position(self, account: Account, market_id: str, change_qty: int, price_cents: int) -> None:
         """
         Calculates new Weighted Average Price and updates portfolio.
         Handles: Opening, Increasing, Decreasing (Realizing P&L), and Flipping positions.
+        The price only becomes a Decimal on the branches that store it.
         """
-        account = self.get_account(user_id)
+        portfolio = account.portfolio
+        pos = portfolio.get(market_id)
 
-        # Get existing position or create new empty one
-        if market_id not in account.portfolio:
-            account.portfolio[market_id] = Position()
+        # Scenario 0: No position yet, open one straight away
+        if pos is None:
+            portfolio[market_id] = Position(change_qty, _from_cents(price_cents))
+            return
 
-        pos = account.portfolio[market_id]
         current_qty = pos.quantity
         current_avg = pos.average_entry_price
 
         new_qty = current_qty + change_qty
 
         # Scenario 1: Closing to 0 (Flat)
+        # Drop the entry so portfolios only ever hold open positions
         if new_qty == 0:
-            pos.quantity = 0
-            pos.average_entry_price = Decimal("0.00")
+            del portfolio[market_id]
+            return
 
         # Scenario 2: Opening new position (from 0)
         if current_qty == 0:
             pos.quantity = new_qty
-            pos.average_entry_price = price
+            pos.average_entry_price = _from_cents(price_cents)
             return
 
         # Check direction
@@ -149,9 +176,9 @@ class EconomyManager:
         # Cost basis needs to be updated.
         if is_same_direction:
             # Weighted Average Formula: (OldVal + NewVal) / TotalQty
-            total_val = (Decimal(abs(current_qty)) * current_avg) + (Decimal(abs(change_qty)) * price)
-            total_qty = Decimal(abs(new_qty))
-            pos.average_entry_price = total_val / total_qty
+            # Decimal * int needs no Decimal(qty) wrapper; the new leg is int cents until the end
+            total_val = current_avg * abs(current_qty) + _from_cents(price_cents * abs(change_qty))
+            pos.average_entry_price = total_val / abs(new_qty)
             pos.quantity = new_qty
             return
 
@@ -168,14 +195,14 @@ class EconomyManager:
         # Scneario 5: Flipping Position (Long to Short or Short to Long)
         # This closes old position and opens a new one with remainder.
         pos.quantity = new_qty
-        pos.average_entry_price = price
+        pos.average_entry_price = _from_cents(price_cents)
 
     def confirm_trade(
         self,
         buyer_id: str,
         seller_id: str,
         market_id: str,
-        price: Decimal,
+        price_cents: int,
         quantity: int,
     ) -> None:
         """
@@ -184,9 +211,29 @@ class EconomyManager:
         Seller: Funds are added to available balance.
         Only substracts locked cash from Buyer
         """
-        cost = price * Decimal(quantity)
+        self._apply_trade(buyer_id, seller_id, market_id, price_cents, quantity)
+
+    def confirm_settlement(self, market_id: str, price_cents: int, fills: list[tuple[str, str, int]]) -> None:
+        """
+        Confirms every settlement trade of one market in a single call.
+        All fills clear at the same terminal price.
+        fills: (buyer_id, seller_id, quantity)
+        """
+        apply_trade = self._apply_trade
+        for buyer_id, seller_id, quantity in fills:
+            apply_trade(buyer_id, seller_id, market_id, price_cents, quantity)
 
+    def _apply_trade(
+        self,
+        buyer_id: str,
+        seller_id: str,
+        market_id: str,
+        price_cents: int,
+        quantity: int,
+    ) -> None:
+        """Cash transfer + position update for one fill."""
         # -- 1: Handle Cash Logic --
+        cost = price_cents * quantity
 
         # Buyer: Pays Cash (from Locked)
         buyer = self.get_account(buyer_id)
@@ -194,9 +241,9 @@ class EconomyManager:
         # TODO: In database, assert >0
 
         # Make sure balances don't go negative.
-        if buyer.balance_locked < Decimal("0.00"):
+        if buyer.balance_locked < 0:
             print(f"CRITICAL: Buyer {buyer_id} had negative locked balance! Resetting.")
-            buyer.balance_locked = Decimal("0.00")
+            buyer.balance_locked = 0
 
         # Seller: Gets Cash (to Available)
         seller = self.get_account(seller_id)
@@ -205,15 +252,15 @@ class EconomyManager:
         # -- 2: Handle Portfolio/Position Logic --
 
         # Buyer: Adds +Quantity
-        self._update_position(buyer_id, market_id, quantity, price)
+        self._update_position(buyer, market_id, quantity, price_cents)
 
         # Seller: Adds -Quantity (Shorts)
-        self._update_position(seller_id, market_id, -quantity, price)
+        self._update_position(seller, market_id, -quantity, price_cents)
 
-    def distribute_ubi(self, amount: Decimal = Decimal("100.00")) -> None:
+    def distribute_ubi(self, amount_cents: int = 10000) -> None:
         """Give everyone their daily bread."""
-        for user_id in self.accounts:
-            self.accounts[user_id].balance_available += amount
+        for account in self.accounts.values():
+            account.balance_available += amount_cents
         # TODO: need database/timestamp log of last distribution
         # so function doesn't run every time server restarts
 
@@ -222,8 +269,9 @@ class EconomyManager:
         """Export all accounts to dictionary."""
         return {
             user_id: {
-                "available": str(acc.balance_available),
-                "locked": str(acc.balance_locked),
+                # Raw int cents: nothing to format on save or parse on load
+                "available_cents": acc.balance_available,
+                "locked_cents": acc.balance_locked,
                 "portfolio": {
                     mid: pos.to_dict() for mid, pos in acc.portfolio.items()
                 },  # This is Dict[str, int], not str
@@ -237,14 +285,23 @@ class EconomyManager:
         self.accounts.clear()
         for user_id, balances in data.items():
             acc = Account(user_id=user_id)
-            acc.balance_available = Decimal(balances["available"])
-            acc.balance_locked = Decimal(balances["locked"])
+            if "available_cents" in balances:
+                acc.balance_available = balances["available_cents"]
+                acc.balance_locked = balances["locked_cents"]
+            else:
+                # Older saves stored dollar strings ("996.00")
+                acc.balance_available = _to_cents(balances["available"])
+                acc.balance_locked = _to_cents(balances["locked"])
 
             # Load Portfolio with Migration Path
             portfolio_data = balances.get("portfolio", {})
             acc.portfolio = {}
 
             for mid, pos_data in portfolio_data.items():
+                # Older saves kept flat (qty 0) positions around
+                if not pos_data or (isinstance(pos_data, dict) and not int(pos_data.get("quantity", 0))):
+                    continue
+
                 if isinstance(pos_data, dict):
                     # Using PositionData format
                     p = Position(
@@ -255,7 +312,7 @@ class EconomyManager:
                 else:
                     # Backward compatibility for old format (int)
                     # Assume entry price is 0 if migrating
-                    p = Position(quantity=int(pos_data), average_entry_price=Decimal("0.00"))
+                    p = Position(quantity=int(pos_data), average_entry_price=_ZERO)
                     acc.portfolio[mid] = p
 
             self.accounts[user_id] = acc
@@ -1,10 +1,11 @@
 """
-User ID Mapper: Converts between string (external) and int (internal) user IDs.
+ID Mappers: Convert between string (external) and int (internal) IDs.
 
 API/Economy layers use string IDs
 and matching engine uses integer IDs for performance.
 """
 
+import zlib
 from typing import Any
 
 
@@ -23,20 +24,23 @@ class UserIdMapper:
         Convert string user_id to internal integer ID.
         Creates a new mapping if the user_id hasn't been seen before.
         """
-        if user_id not in self._str_to_int:
+        # Single lookup on the common path (user already mapped)
+        internal_id = self._str_to_int.get(user_id)
+        if internal_id is None:
             internal_id = self._next_id
             self._next_id += 1
             self._str_to_int[user_id] = internal_id
             self._int_to_str[internal_id] = user_id
-        return self._str_to_int[user_id]
+        return internal_id
 
     def to_external(self, internal_id: int) -> str:
         """
         Convert internal integer ID back to string user_id.
         """
-        if internal_id not in self._int_to_str:
-            raise KeyError(f"Unknown internal ID: {internal_id}")
-        return self._int_to_str[internal_id]
+        try:
+            return self._int_to_str[internal_id]
+        except KeyError:
+            raise KeyError(f"Unknown internal ID: {internal_id}") from None
 
     def has_external(self, user_id: str) -> bool:
         """Check if a string user_id has been mapped."""
@@ -62,3 +66,69 @@ class UserIdMapper:
         self._int_to_str = {}
         for k, v in self._str_to_int.items():
             self._int_to_str[v] = k
+
+
+class OrderIdMapper:
+    """
+    Maps client string order IDs to internal integer IDs.
+
+    IDs are assigned sequentially, so two distinct client IDs never share an
+    engine ID (32-bit CRC hashes start colliding within tens of thousands of orders).
+    Numbering starts above the 32-bit range so it can't clash with CRC32 IDs
+    still resting in older save files.
+
+    Only orders still on the book keep a mapping: the interface calls
+    release() once an order fills or is cancelled, so the map (and the
+    "order_ids" save entry) stays the size of the resting book.
+    """
+
+    FIRST_ID = 1 << 32
+
+    def __init__(self) -> None:
+        self._str_to_int: dict[str, int] = {}
+        self._int_to_str: dict[int, str] = {}
+        self._next_id: int = self.FIRST_ID
+
+    def to_internal(self, order_id: str) -> int:
+        """
+        Convert string order_id to internal integer ID.
+        Creates a new mapping if the order_id hasn't been seen before.
+        """
+        internal_id = self._str_to_int.get(order_id)
+        if internal_id is None:
+            internal_id = self._next_id
+            self._next_id += 1
+            self._str_to_int[order_id] = internal_id
+            self._int_to_str[internal_id] = order_id
+        return internal_id
+
+    def lookup(self, order_id: str) -> int:
+        """
+        Resolve a string order_id without creating a mapping (for cancels).
+        Unmapped IDs fall back to their CRC32, which is how orders resting
+        from older save files were numbered.
+        """
+        internal_id = self._str_to_int.get(order_id)
+        if internal_id is None:
+            return zlib.crc32(order_id.encode())
+        return internal_id
+
+    def release(self, internal_id: int) -> None:
+        """Forget the mapping of an order that has left the book (no-op if unmapped)."""
+        order_id = self._int_to_str.pop(internal_id, None)
+        if order_id is not None:
+            del self._str_to_int[order_id]
+
+    # Persistence Methods for server.py
+
+    def dump_state(self) -> dict[str, Any]:
+        """Return state dict for JSON saving."""
+        return {"map": self._str_to_int, "next_id": self._next_id}
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        """Restore state from JSON dict."""
+        self._str_to_int = state.get("map", {})
+        self._next_id = state.get("next_id", self.FIRST_ID)
+
+        # Rebuild the reverse map (internal -> external) used by release()
+        self._int_to_str = {v: k for k, v in self._str_to_int.items()}
@@ -2,6 +2,7 @@ from collections.abc import Iterator
 from dataclasses import dataclass
 
 from .node import OrderNode
+from .types import PriceLevel
 
 
 @dataclass(slots=True)
@@ -58,6 +59,30 @@ class OrderList:
         order.next_node = None
         order.prev_node = None
 
+    def remove_head(self, order: OrderNode) -> None:
+        """
+        Removes the given order, which must be the current head (oldest)
+        Matching always fills from the head, so it skips remove()'s prev checks
+        O(1)
+        """
+        self.total_volume -= order.quantity
+        self.count -= 1
+
+        next_order = order.next_node
+        self.head = next_order
+        if next_order is None:
+            self.tail = None
+        else:
+            next_order.prev_node = None
+            order.next_node = None
+
+    def as_price_level(self, price: int) -> PriceLevel:
+        """
+        Snapshot row for this level, read from the running totals
+        O(1), no walk over the orders
+        """
+        return {"price": price, "volume": self.total_volume, "count": self.count}
+
     def __iter__(self) -> Iterator[OrderNode]:
         current = self.head
         while current:
@@ -3,24 +3,23 @@
 
 # We'll have to use Apple's Network.framework (NWConnection)
 # to send raw strings ending in `\n`
-import json
 import socket
-from typing import Any
+from typing import Any, BinaryIO
 
+import orjson
 
-def send_request(sock: socket.socket, request_dict: dict[str, Any]) -> dict[str, Any]:
+
+def send_request(sock: socket.socket, rfile: BinaryIO, request_dict: dict[str, Any]) -> dict[str, Any]:
     """Helper to send JSON and get JSON response"""
-    msg = json.dumps(request_dict).encode() + b"\n"
+    msg = orjson.dumps(request_dict, option=orjson.OPT_APPEND_NEWLINE)
     sock.sendall(msg)
 
-    data = b""
-    while b"\n" not in data:
-        chunk = sock.recv(4096)
-        if not chunk:
-            raise ConnectionError("Server closed connection")
-        data += chunk
-
-    result: dict[str, Any] = json.loads(data.decode().strip())
+    # rfile = sock.makefile("rb"), one per connection: readline scans the buffer once
+    # instead of re-searching everything received so far after every recv()
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError("Server closed connection")
+    result: dict[str, Any] = orjson.loads(line)
     return result
 
 
@@ -34,6 +33,9 @@ def test_market_discovery() -> None:
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         s.connect((host, port))
+        # One small frame per request: send it now rather than let Nagle hold it back
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        rfile = s.makefile("rb")
 
         # 1. Create a market implicitly by placing an order
         print("Creating market via order...")
@@ -46,12 +48,12 @@ def test_market_discovery() -> None:
             "user_id": "market_maker",
             "market_id": {"target_user_id": "alice", "threshold_minutes": 60},
         }
-        resp = send_request(s, req)
+        resp = send_request(s, rfile, req)
         print(f"Response: {resp}")
 
         # 2. Ask what markets exist
         print("Listing markets...")
-        resp = send_request(s, {"type": "get_markets"})
+        resp = send_request(s, rfile, {"type": "get_markets"})
         print(f"Markets: {resp}")
 
         # Add assertions here based on expected behavior
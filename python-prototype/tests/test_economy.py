@@ -0,0 +1,76 @@
+"""
+Test EconomyManager position bookkeeping.
+"""
+
+from decimal import Decimal
+
+from orderbook.economy import EconomyManager, Position
+
+
+def test_closed_position_is_pruned() -> None:
+    """A position that returns to flat should leave the portfolio entirely."""
+    economy = EconomyManager()
+    economy.deposit("alice", 1000)
+    economy.attempt_order_lock("alice", 50, 4)
+
+    # Alice buys 4 from bob, then sells them back
+    economy.confirm_trade("alice", "bob", "bob,480", 50, 4)
+    assert economy.get_account("alice").portfolio["bob,480"].quantity == 4
+
+    economy.confirm_trade("bob", "alice", "bob,480", 50, 4)
+    assert "bob,480" not in economy.get_account("alice").portfolio
+    assert "bob,480" not in economy.get_account("bob").portfolio
+
+
+def test_load_skips_flat_positions() -> None:
+    """Saves written before pruning may still contain qty 0 entries (and dollar-string balances)."""
+    economy = EconomyManager()
+    economy.load_state(
+        {
+            "alice": {
+                "available": "5.00",
+                "locked": "0.00",
+                "portfolio": {
+                    "bob,480": {"quantity": 0, "average_entry_price": "0.00"},
+                    "bob,360": {"quantity": 3, "average_entry_price": "0.40"},
+                    "carol,480": 0,  # Legacy int format
+                },
+            }
+        }
+    )
+
+    assert economy.get_account("alice").balance_available == 500
+    portfolio = economy.get_account("alice").portfolio
+    assert portfolio == {"bob,360": Position(quantity=3, average_entry_price=Decimal("0.40"))}
+
+
+def test_confirm_settlement_matches_per_trade_confirms() -> None:
+    """A settlement batch leaves accounts exactly as confirming each trade would."""
+    fills = [("alice", "house", 3), ("house", "bob", 2), ("carol", "house", 1)]
+
+    one_by_one = EconomyManager()
+    batched = EconomyManager()
+    for economy in (one_by_one, batched):
+        for user in ("alice", "bob", "carol", "house"):
+            economy.deposit(user, 100)
+            economy.attempt_order_lock(user, 1, 5)
+
+    for buyer, seller, qty in fills:
+        one_by_one.confirm_trade(buyer, seller, "bob,480", 1, qty)
+    batched.confirm_settlement("bob,480", 1, fills)
+
+    assert batched.dump_state() == one_by_one.dump_state()
+
+
+def test_cents_roundtrip_through_state() -> None:
+    """Int cents balances save as raw ints and load back unchanged."""
+    economy = EconomyManager()
+    economy.deposit("alice", 99605)
+    economy.process_doomscroll_burn("alice", 7)  # 58.33 cents rounds to 58
+
+    state = economy.dump_state()
+    assert state["alice"]["available_cents"] == 99547
+
+    restored = EconomyManager()
+    restored.load_state(state)
+    assert restored.get_account("alice").balance_available == 99547
@@ -1,5 +1,3 @@
-from decimal import Decimal
-
 from hypothesis import strategies as st
 from hypothesis.stateful import (
     Bundle,
@@ -39,8 +37,8 @@ class OrderBookFuzzer(RuleBasedStateMachine):
 
         # 1. Setup Users & Funding
         # EconomyManager creates users implicitly when you deposit
-        self.economy.deposit("alice", Decimal("10000.00"))
-        self.economy.deposit("bob", Decimal("10000.00"))
+        self.economy.deposit("alice", 1000000)
+        self.economy.deposit("bob", 1000000)
 
         # 2. Setup Inventory (Shares)
         # Alice needs shares to sell. Bob needs shares to sell.
@@ -73,7 +71,7 @@ class OrderBookFuzzer(RuleBasedStateMachine):
 
         # 1. LOCK FUNDS (Buyers only)
         if side == "buy":
-            success = self.economy.attempt_order_lock(user_id=user, price=Decimal(price), quantity=qty)
+            success = self.economy.attempt_order_lock(user_id=user, price_cents=price, quantity=qty)
             if not success:
                 return order_id
 
@@ -97,7 +95,7 @@ class OrderBookFuzzer(RuleBasedStateMachine):
                 buyer_id=buyer_str,
                 seller_id=seller_str,
                 market_id=MARKET_ID_STR,
-                price=Decimal(trade.price),
+                price_cents=trade.price,
                 quantity=trade.quantity,
             )
 
@@ -115,7 +113,7 @@ class OrderBookFuzzer(RuleBasedStateMachine):
         if metadata and metadata.side == "buy":
             self.economy.release_order_lock(
                 user_id=str(metadata.user_id),
-                price=Decimal(metadata.price),
+                price_cents=metadata.price,
                 quantity=metadata.quantity,
             )
 
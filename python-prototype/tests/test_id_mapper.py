@@ -3,7 +3,9 @@
 # or
 # uv run pytest tests/test_id_mapper.py -v
 
-from orderbook.id_mapper import UserIdMapper
+import zlib
+
+from orderbook.id_mapper import OrderIdMapper, UserIdMapper
 
 
 def test_basic_conversion() -> None:
@@ -146,3 +148,56 @@ def test_different_string_formats() -> None:
     assert mapper.to_external(uuid_id) == "550e8400-e29b-41d4-a716-446655440000"
     assert mapper.to_external(numeric_id) == "12345"
     assert mapper.to_external(email_id) == "user@example.com"
+
+
+def test_order_ids_are_distinct_and_stable() -> None:
+    """Distinct client order IDs never share an engine ID, and repeats map the same."""
+    mapper = OrderIdMapper()
+
+    ids = [mapper.to_internal(f"order-{i}") for i in range(100_000)]
+    assert len(set(ids)) == len(ids)
+    assert mapper.to_internal("order-42") == ids[42]
+
+    # Above the 32-bit range, so legacy CRC32 IDs in old saves can't clash
+    assert min(ids) > 0xFFFFFFFF
+
+
+def test_order_id_mapper_persistence() -> None:
+    """Order ID mappings survive a dump/load round trip."""
+    mapper = OrderIdMapper()
+    first = mapper.to_internal("uuid-1")
+    mapper.to_internal("uuid-2")
+
+    restored = OrderIdMapper()
+    restored.load_state(mapper.dump_state())
+
+    assert restored.to_internal("uuid-1") == first
+    assert restored.to_internal("uuid-3") == mapper.to_internal("uuid-3")
+
+
+def test_order_id_lookup_does_not_insert() -> None:
+    """Cancels resolve IDs without growing the map; unknown IDs fall back to legacy CRC32."""
+    mapper = OrderIdMapper()
+    placed = mapper.to_internal("uuid-1")
+
+    assert mapper.lookup("uuid-1") == placed
+    assert mapper.lookup("bogus") == zlib.crc32(b"bogus")
+    assert mapper.dump_state()["map"] == {"uuid-1": placed}
+
+
+def test_order_id_release_forgets_mapping() -> None:
+    """Released IDs leave the map (and survive a reload released)."""
+    mapper = OrderIdMapper()
+    first = mapper.to_internal("uuid-1")
+    second = mapper.to_internal("uuid-2")
+
+    mapper.release(first)
+    mapper.release(12345)  # Unmapped (int client ID / legacy): no-op
+    assert mapper.dump_state()["map"] == {"uuid-2": second}
+
+    restored = OrderIdMapper()
+    restored.load_state(mapper.dump_state())
+    restored.release(second)
+    assert restored.dump_state()["map"] == {}
+    # Numbering continues, a new order never reuses a released ID
+    assert restored.to_internal("uuid-1") > second
@@ -1,26 +1,26 @@
-import json
 import os
 import socket
 import uuid
-from typing import Any
+from typing import Any, BinaryIO
+
+import orjson
 
 # Configuration via environment variables
 HOST = os.getenv("TEST_SERVER_HOST", "127.0.0.1")
 PORT = int(os.getenv("TEST_SERVER_PORT", "8888"))
 
 
-def send_request(sock: socket.socket, request_dict: dict[str, Any]) -> dict[str, Any]:
+def send_request(sock: socket.socket, rfile: BinaryIO, request_dict: dict[str, Any]) -> dict[str, Any]:
     """Helper to send JSON and get JSON response"""
-    msg = json.dumps(request_dict).encode() + b"\n"
+    msg = orjson.dumps(request_dict, option=orjson.OPT_APPEND_NEWLINE)
     sock.sendall(msg)
 
-    data = b""
-    while b"\n" not in data:
-        chunk = sock.recv(4096)
-        if not chunk:
-            raise ConnectionError("Server closed connection")
-        data += chunk
-    result: dict[str, Any] = json.loads(data.decode().strip())
+    # rfile = sock.makefile("rb"), one per connection: readline scans the buffer once
+    # instead of re-searching everything received so far after every recv()
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError("Server closed connection")
+    result: dict[str, Any] = orjson.loads(line)
     return result
 
 
@@ -33,13 +33,16 @@ def test_integration() -> None:
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         s.connect((HOST, PORT))
+        # One small frame per request: send it now rather than let Nagle hold it back
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        rfile = s.makefile("rb")
 
         # 1. Check Initial Balance (Should be 0.00)
-        resp = send_request(s, {"type": "balance", "user_id": user})
+        resp = send_request(s, rfile, {"type": "balance", "user_id": user})
         assert resp["available"] == "0.00"
 
         # 2. Mint Money (Proof of Walk)
-        resp = send_request(s, {"type": "proof_of_walk", "user_id": user, "steps": 10000})
+        resp = send_request(s, rfile, {"type": "proof_of_walk", "user_id": user, "steps": 10000})
         assert resp["new_balance"] == "100.00"
 
         # 3. Place Buy Order (Lock Funds)
@@ -52,7 +55,7 @@ def test_integration() -> None:
             "user_id": user,
             "market_id": {"target_user_id": "target_A", "threshold_minutes": 60},
         }
-        resp = send_request(s, req)
+        resp = send_request(s, rfile, req)
 
         # DEBUG
         print(f"Order response: {resp}")  # Add this to see the error
@@ -64,7 +67,7 @@ def test_integration() -> None:
         assert resp["status"] == "ok", f"Order failed: {resp.get('message', 'Unknown error')}"
 
         # 4. Check Balance (Should be 50 available, 50 locked)
-        resp = send_request(s, {"type": "balance", "user_id": user})
+        resp = send_request(s, rfile, {"type": "balance", "user_id": user})
         assert resp["available"] == "50.00"
         assert resp["locked"] == "50.00"
 
@@ -1,7 +1,8 @@
 # tests audit.py
 
 import random
-from decimal import Decimal
+
+import pytest
 
 from engine.engine import MatchingEngine
 from orderbook.audit import SystemAuditor
@@ -17,9 +18,9 @@ def test_system_stress() -> None:
     users = ["user_1", "user_2", "user_3"]
     for u in users:
         account = economy.get_account(u)
-        account.balance_available = Decimal("1000.00")
+        account.balance_available = 100000
         # economy.deposit(
-        #     u, Decimal("1000.00")
+        #     u, 100000
         # )
 
     market_id = ("alice", 480)
@@ -43,6 +44,63 @@ def test_system_stress() -> None:
         auditor.run_full_audit()
 
 
+def test_book_counters_match_resummed_totals() -> None:
+    """The auditor's running totals must agree with a full re-sum of the book."""
+    engine = MatchingEngine()
+    market_id = ("alice", 480)
+    rng = random.Random(7)
+
+    for i in range(200):
+        if i % 5 == 4:
+            engine.cancel_order(rng.randrange(i))
+        else:
+            engine.process_order(
+                market_id, rng.choice(["buy", "sell"]), rng.randint(90, 110), rng.randint(1, 10), i, rng.randint(1, 3)
+            )
+
+        book = engine._markets[market_id]
+        assert book._resting_qty == sum(order.quantity for order in book._orders.values())
+
+    book.settle_market(1)
+    assert book._resting_qty == 0
+    assert not book._orders and not book._bids and not book._asks
+    assert book.get_best_bid() is None and book.get_best_ask() is None
+    assert sum(book._positions.values()) == 0
+
+
+def test_audit_catches_unbalanced_positions() -> None:
+    """A position that no fill accounts for must fail the conservation audit."""
+    engine = MatchingEngine()
+    auditor = SystemAuditor(engine, EconomyManager())
+    market_id = (1, 480)
+    engine.process_order(market_id, "sell", 60, 5, 1, 2)
+    engine.process_order(market_id, "buy", 60, 5, 2, 3)
+    auditor.run_full_audit()
+
+    engine._markets[market_id]._positions[2] += 7
+    with pytest.raises(ValueError, match="unbalanced! Net: 7"):
+        auditor.run_full_audit()
+
+
+def test_settle_collects_trades_across_a_users_markets() -> None:
+    """Settling a user closes only their markets and returns every position's trade in one list."""
+    engine = MatchingEngine()
+    engine.process_order((1, 300), "sell", 40, 2, 1, 10)
+    engine.process_order((1, 300), "buy", 40, 2, 2, 11)
+    engine.create_market((1, 600), "Never traded")
+    engine.process_order((2, 300), "sell", 40, 1, 3, 10)
+
+    trades = engine.settle_markets_for_user(1, 400)
+
+    # Long 11 and short 10 in (1, 300), which resolves YES (400 >= 300)
+    assert sorted((t.buy_user_id, t.sell_user_id, t.quantity, t.price) for t in trades) == [
+        (0, 10, 2, 1),
+        (11, 0, 2, 1),
+    ]
+    assert not engine._markets[(1, 600)].active
+    assert engine._markets[(2, 300)].active
+
+
 if __name__ == "__main__":
     test_system_stress()
 
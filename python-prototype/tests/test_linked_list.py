@@ -74,3 +74,24 @@ def test_remove_middle() -> None:
     assert ol.total_volume == 40
     assert o1.next_node == o3
     assert o3.prev_node == o1
+
+
+def test_remove_head_fast_path() -> None:
+    ol = OrderList()
+    o1 = create_order(1, 10)
+    o2 = create_order(2, 20)
+    ol.append(o1)
+    ol.append(o2)
+
+    ol.remove_head(o1)
+    assert ol.head == o2
+    assert ol.count == 1
+    assert ol.total_volume == 20
+    assert o2.prev_node is None
+    assert o1.next_node is None
+
+    ol.remove_head(o2)
+    assert ol.head is None
+    assert ol.tail is None
+    assert ol.count == 0
+    assert ol.total_volume == 0
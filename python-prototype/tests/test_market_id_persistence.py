@@ -6,6 +6,7 @@ could appear twice in the client due to inconsistent username/ID conversion.
 """
 
 from engine.engine import MatchingEngine
+from engine.interface import _parse_market_id
 from orderbook.id_mapper import UserIdMapper
 
 
@@ -148,3 +149,51 @@ def test_load_and_save_cycle_preserves_format():
     # Compare states - should be identical
     assert state1 == state2
     assert list(state1["markets"].keys()) == list(state2["markets"].keys())
+
+
+def test_parse_market_id_string_formats():
+    """Both "alice_480" and "alice,480" resolve to the same engine market."""
+    mapper = UserIdMapper()
+    alice_id = mapper.to_internal("alice")
+
+    assert _parse_market_id("alice_480", mapper) == (alice_id, 480)
+    assert _parse_market_id("alice,480", mapper) == (alice_id, 480)
+
+    # Comma format keeps underscores in the username intact
+    bob_id = mapper.to_internal("bob_smith")
+    assert _parse_market_id("bob_smith,360", mapper) == (bob_id, 360)
+
+
+def test_owner_index_rebuilt_on_load():
+    """Settlement's per-user market index must match the markets after a reload."""
+    engine = MatchingEngine()
+    engine.create_market((1, 480), "User 1 8:00")
+    engine.create_market((1, 360), "User 1 6:00")
+    engine.create_market((2, 480), "User 2 8:00")
+
+    engine2 = MatchingEngine()
+    engine2.create_market((3, 60), "Stale market")  # Wiped by load_state
+    engine2.load_state(engine.dump_state())
+
+    assert sorted(engine2._markets_by_user[1]) == [(1, 360), (1, 480)]
+    assert engine2._markets_by_user[2] == [(2, 480)]
+    assert 3 not in engine2._markets_by_user
+
+
+def test_active_markets_rebuild_only_changed_entries():
+    """Unchanged markets reuse their cached entry; touched or renamed ones are rebuilt."""
+    engine = MatchingEngine()
+    engine.create_market((1, 480), "A")
+    engine.create_market((2, 480), "B")
+    engine.process_order(market_id=(1, 480), side="buy", price=40, quantity=5, order_id=1, user_id=1)
+
+    first = {m["id"]: m for m in engine.get_active_markets()}
+    assert first["1_480"]["best_bid"] == 40
+
+    engine.process_order(market_id=(1, 480), side="sell", price=60, quantity=5, order_id=2, user_id=2)
+    engine.create_market((2, 480), "B renamed")
+    second = {m["id"]: m for m in engine.get_active_markets()}
+
+    assert second["1_480"]["best_ask"] == 60
+    assert second["2_480"]["name"] == "B renamed"
+    assert engine.get_active_markets()[0] is second["1_480"]
@@ -1,5 +1,7 @@
 # Usage: uv run pytest
 
+import pytest
+
 from orderbook.book import OrderBook
 
 
@@ -101,3 +103,26 @@ def test_multi_level_sweep() -> None:
 
     # Check book state
     assert book.get_best_ask() == 101  # Order #2 still has 2 shares left
+
+
+def test_sell_taker_sweeps_bids_best_first() -> None:
+    """Sell side runs the same match loop: highest bid first, maker is the buyer."""
+    book = OrderBook()
+    book.process_order("buy", 99, 5, 1, user_id=1)
+    book.process_order("buy", 100, 5, 2, user_id=2)
+
+    trades = book.process_order("sell", 98, 8, 3, user_id=3)
+
+    assert [(t.price, t.quantity, t.buy_user_id, t.sell_user_id) for t in trades] == [(100, 5, 2, 3), (99, 3, 1, 3)]
+    assert book._positions == {2: 5, 1: 3, 3: -8}
+    assert book.get_best_bid() == 99
+
+
+def test_invalid_side_is_rejected() -> None:
+    """An unknown side must not leave a half-placed order behind."""
+    book = OrderBook()
+
+    with pytest.raises(ValueError):
+        book.process_order("limit", 100, 5, 1, user_id=1)
+
+    assert book._orders == {}
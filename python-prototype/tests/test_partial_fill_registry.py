@@ -5,8 +5,6 @@ This test verifies the fix for the registry mismatch bug where partial fills
 don't update the registry when the maker order wasn't previously registered.
 """
 
-from decimal import Decimal
-
 from engine.engine import MatchingEngine
 from orderbook.economy import EconomyManager
 
@@ -21,8 +19,8 @@ def test_partial_fill_updates_registry():
     engine.create_market(market_id, "Test Market")
 
     # Fund both users
-    economy.get_account("user_1").balance_available = Decimal("100.00")
-    economy.get_account("user_2").balance_available = Decimal("100.00")
+    economy.get_account("user_1").balance_available = 10000
+    economy.get_account("user_2").balance_available = 10000
 
     # Scenario: Maker places sell order (10 contracts at $0.60)
     # Taker partially fills it (buys only 3 contracts)
@@ -71,8 +69,8 @@ def test_partial_fill_missing_registry_entry():
     # Setup
     market_id = (1, 480)
     engine.create_market(market_id, "Test Market")
-    economy.get_account("user_1").balance_available = Decimal("100.00")
-    economy.get_account("user_2").balance_available = Decimal("100.00")
+    economy.get_account("user_1").balance_available = 10000
+    economy.get_account("user_2").balance_available = 10000
 
     # Step 1: Maker places sell order
     trades1 = engine.process_order(
@@ -164,3 +162,19 @@ def test_full_fill_removes_from_registry():
     # CRITICAL: Fully filled order should be removed from registry
     assert 1 not in engine._order_registry
     assert 1 not in engine._markets[market_id]._orders
+
+
+def test_recycled_metadata_describes_new_order():
+    """Metadata freed by a full fill is reused without leaking the old order's fields."""
+    engine = MatchingEngine()
+    market_id = (1, 480)
+
+    engine.process_order(market_id=market_id, side="sell", price=60, quantity=5, order_id=1, user_id=1)
+    engine.process_order(market_id=market_id, side="buy", price=60, quantity=5, order_id=2, user_id=2)
+    assert 1 not in engine._order_registry
+
+    engine.process_order(market_id=(2, 360), side="buy", price=40, quantity=7, order_id=3, user_id=3)
+
+    meta = engine._order_registry[3]
+    assert (meta.market_id, meta.side, meta.price, meta.quantity, meta.user_id) == ((2, 360), "buy", 40, 7, 3)
+    assert engine.cancel_order(3) is meta
@@ -1,24 +1,24 @@
-import json
 import os
 import socket
-import time
 import uuid
-from typing import Any
+from typing import Any, BinaryIO
+
+import orjson
 
 HOST = os.getenv("TEST_SERVER_HOST", "127.0.0.1")
 PORT = int(os.getenv("TEST_SERVER_PORT", "8888"))
 
 
-def send_request(sock: socket.socket, request_dict: dict[str, Any]) -> dict[str, Any]:
-    msg = json.dumps(request_dict).encode() + b"\n"
+def send_request(sock: socket.socket, rfile: BinaryIO, request_dict: dict[str, Any]) -> dict[str, Any]:
+    msg = orjson.dumps(request_dict, option=orjson.OPT_APPEND_NEWLINE)
     sock.sendall(msg)
-    data = b""
-    while b"\n" not in data:
-        chunk = sock.recv(4096)
-        if not chunk:
-            break
-        data += chunk
-    result: dict[str, Any] = json.loads(data.decode().strip())
+
+    # rfile = sock.makefile("rb"), one per connection: readline scans the buffer once
+    # instead of re-searching everything received so far after every recv()
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError("Server closed connection")
+    result: dict[str, Any] = orjson.loads(line)
     return result
 
 
@@ -29,18 +29,22 @@ def test_persistence() -> None:
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
         s.connect((HOST, PORT))
+        # One small frame per request: send it now rather than let Nagle hold it back
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        rfile = s.makefile("rb")
 
         # 1. Create state: Mint 100.00
         print(f"Creating state for {user}...")
-        send_request(s, {"type": "proof_of_walk", "user_id": user, "steps": 10000})
+        send_request(s, rfile, {"type": "proof_of_walk", "user_id": user, "steps": 10000})
 
         # 2. Wait for Disk I/O
-        # (Wait for your server's periodic save or just a buffer for the OS)
-        print("Waiting for server persistence...")
-        time.sleep(1.1)
+        # A server started with TEST_MODE=1 saves + fsyncs before replying; others reject the
+        # request, and the reply still arrives after step 1 has been applied
+        print("Flushing server state...")
+        send_request(s, rfile, {"type": "flush"})
 
         # 3. Verify state
-        response = send_request(s, {"type": "balance", "user_id": user})
+        response = send_request(s, rfile, {"type": "balance", "user_id": user})
         assert response.get("total_equity") == "100.00"
 
         print(f"[+] SUCCESS: State persisted for {user}")
@@ -1,8 +1,14 @@
+import asyncio
+import logging
 import uuid
+import zlib
 from typing import Any
 
+import orjson
 import pytest
 
+from engine.engine import MarketId, MatchingEngine
+from orderbook.book import OrderBook
 from server import OrderBookServer
 
 
@@ -60,3 +66,265 @@ async def test_full_user_flow() -> None:
     # $10.00 * 5 = $50.00 locked
     assert resp_final["available"] == "50.00"
     assert resp_final["locked"] == "50.00"
+
+
+@pytest.mark.asyncio
+async def test_trade_response_is_json_encodable() -> None:
+    """A filled order returns Trade objects; the wire encoder must handle them."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+
+    user = f"test_user_{uuid.uuid4().hex[:8]}"
+    await server.process_request({"type": "proof_of_walk", "user_id": user, "steps": 10000}, "internal_test")
+
+    # Crosses the market maker's seeded ask at 60
+    req_order = {
+        "type": "place_order",
+        "side": "buy",
+        "price": 60,
+        "qty": 2,
+        "id": "order_1",
+        "user_id": user,
+        "market_id": "alice,480",
+    }
+    resp_order = await server.process_request(req_order, "internal_test")
+    assert resp_order["num_trades"] == 1  # type: ignore[typeddict-item]
+
+    decoded = orjson.loads(orjson.dumps(resp_order))
+    assert decoded["trades"][0]["price"] == 60
+    assert decoded["trades"][0]["quantity"] == 2
+
+
+@pytest.mark.asyncio
+async def test_length_prefixed_and_newline_framing() -> None:
+    """One server accepts both NDJSON and length-prefixed clients on the same port."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    tcp_server = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    request = orjson.dumps({"type": "get_markets"})
+
+    async with tcp_server:
+        # Newline-delimited (iOS client)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request + b"\n")
+        line = await reader.readuntil(b"\n")
+        assert orjson.loads(line)["markets"][0]["id"] == "alice,480"
+        writer.close()
+        await writer.wait_closed()
+
+        # Length-prefixed: 4-byte big-endian size, reply framed the same way
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for _ in range(2):
+            writer.write(len(request).to_bytes(4, "big") + request)
+            size = int.from_bytes(await reader.readexactly(4), "big")
+            assert orjson.loads(await reader.readexactly(size))["markets"][0]["id"] == "alice,480"
+        writer.close()
+        await writer.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_audit_runs_every_interval() -> None:
+    """The full audit is sampled, not run after every order."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    server.interface.audit_interval = 3
+
+    audits = 0
+
+    def counting_audit() -> None:
+        nonlocal audits
+        audits += 1
+
+    server.auditor.run_full_audit = counting_audit  # type: ignore[method-assign]
+
+    for i in range(7):
+        req_order = {
+            "type": "place_order",
+            "side": "sell",
+            "price": 90,
+            "qty": 1,
+            "id": f"audit_{i}",
+            "user_id": "market_maker",
+            "market_id": "alice,480",
+        }
+        resp = await server.process_request(req_order, "internal_test")
+        assert resp["status"] == "ok"
+
+    # First order after startup, then every third: orders 1, 4 and 7
+    assert audits == 3
+
+
+@pytest.mark.asyncio
+async def test_audit_failure_names_orders_since_last_audit() -> None:
+    """A sampled audit failure blames the whole unaudited window, not just the order that tripped it."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    server.interface.audit_interval = 3
+
+    async def place(i: int) -> dict[str, Any]:
+        req_order = {
+            "type": "place_order",
+            "side": "sell",
+            "price": 90,
+            "qty": 1,
+            "id": i,
+            "user_id": "market_maker",
+            "market_id": "alice,480",
+        }
+        return await server.process_request(req_order, "internal_test")  # type: ignore[return-value]
+
+    assert (await place(101))["status"] == "ok"  # Startup audit passes
+
+    await place(102)
+    alice_id = server.user_id_mapper.to_internal("alice")
+    server.engine._markets[(alice_id, 480)]._positions[999] = 5  # Corruption after order 102
+    await place(103)
+    resp = await place(104)
+
+    assert resp["status"] == "error"
+    assert "unbalanced! Net: 5" in resp["message"]
+    assert "orders 102..104" in resp["message"]
+
+
+@pytest.mark.asyncio
+async def test_settle_only_touches_target_users_markets() -> None:
+    """Settling alice closes alice's markets and leaves everyone else's trading."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+
+    # Second market owned by someone else
+    req_order = {
+        "type": "place_order",
+        "side": "sell",
+        "price": 70,
+        "qty": 1,
+        "id": "bob_market_ask",
+        "user_id": "market_maker",
+        "market_id": "bob,300",
+    }
+    assert (await server.process_request(req_order, "internal_test"))["status"] == "ok"
+
+    req_settle = {"type": "settle", "target_user_id": "alice", "actual_screentime_minutes": 500}
+    resp = await server.process_request(req_settle, "internal_test")
+    assert resp["markets_settled"] == 1  # type: ignore[typeddict-item]
+
+    alice_id = server.user_id_mapper.to_internal("alice")
+    bob_id = server.user_id_mapper.to_internal("bob")
+    assert not server.engine._markets[(alice_id, 480)].active
+    assert server.engine._markets[(bob_id, 300)].active
+
+
+@pytest.mark.asyncio
+async def test_order_id_mappings_follow_the_book() -> None:
+    """Client order IDs are mapped only while the order rests; cancels never add mappings."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    server.economy.get_account("buyer").balance_available = 10000
+    addr = "internal_test"
+
+    def order(order_id: str, side: str, price: int, qty: int, user: str) -> dict[str, Any]:
+        return {
+            "type": "place_order",
+            "side": side,
+            "price": price,
+            "qty": qty,
+            "id": order_id,
+            "user_id": user,
+            "market_id": "alice,480",
+        }
+
+    # Resting ask, then a buy that fills it completely: both IDs are done
+    assert (await server.process_request(order("ask", "sell", 55, 2, "market_maker"), addr))["status"] == "ok"
+    assert (await server.process_request(order("bid", "buy", 55, 2, "buyer"), addr))["status"] == "ok"
+    assert server.order_id_mapper.dump_state()["map"] == {}
+
+    # Resting order stays mapped until it is cancelled
+    assert (await server.process_request(order("rest", "sell", 58, 1, "market_maker"), addr))["status"] == "ok"
+    assert set(server.order_id_mapper.dump_state()["map"]) == {"rest"}
+    assert (await server.process_request({"type": "cancel", "id": "rest"}, addr))["status"] == "ok"
+
+    # Bogus cancels are rejected without creating mappings
+    for i in range(100):
+        resp = await server.process_request({"type": "cancel", "id": f"bogus-{i}"}, addr)
+        assert resp["status"] == "error"
+    assert server.order_id_mapper.dump_state()["map"] == {}
+
+
+@pytest.mark.asyncio
+async def test_legacy_crc32_order_can_be_cancelled() -> None:
+    """Orders resting from a pre-mapper save (CRC32 IDs) still cancel by their client ID."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    mm_id = server.user_id_mapper.to_internal("market_maker")
+    alice_id = server.user_id_mapper.to_internal("alice")
+    legacy_id = zlib.crc32(b"old-order")
+    server.engine.process_order((alice_id, 480), "sell", 90, 3, legacy_id, mm_id)
+
+    resp = await server.process_request({"type": "cancel", "id": "old-order"}, "internal_test")
+    assert resp["status"] == "ok"
+    assert legacy_id not in server.engine._order_registry
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_are_logged_at_error(caplog: pytest.LogCaptureFixture) -> None:
+    """Internal exceptions reach the log at the production INFO level, not just in debug."""
+    server = OrderBookServer()
+    caplog.set_level(logging.INFO, logger="server")
+
+    resp = await server.process_request({"type": "balance"}, "internal_test")  # Missing user_id
+
+    assert resp["status"] == "error"
+    errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+    assert errors and "Unexpected Logic Error" in errors[0].getMessage()
+    assert errors[0].exc_info is not None
+
+
+@pytest.mark.asyncio
+async def test_price_improvement_refund_is_logged_not_printed(
+    caplog: pytest.LogCaptureFixture, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """The refund line is a lazy debug log record; the engine thread never writes to stdout."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    server.economy.get_account("buyer").balance_available = 10000
+    caplog.set_level(logging.DEBUG, logger="engine.interface")
+    capsys.readouterr()
+
+    req = {"side": "buy", "qty": 1, "user_id": "buyer", "market_id": "alice,480"}
+    await server.process_request({**req, "type": "place_order", "price": 70, "id": "improved"}, "internal_test")
+
+    refunds = [r for r in caplog.records if "Price improvement refund" in r.getMessage()]
+    assert [r.levelno for r in refunds] == [logging.DEBUG]
+    assert "Price improvement" not in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_place_order_probes_the_market_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The interface hands its looked-up book to the engine; existing markets get no second probe."""
+    server = OrderBookServer()
+    server.seed_dev_data()
+    server.economy.get_account("buyer").balance_available = 10000
+
+    engine_lookups: list[MarketId] = []
+    original = MatchingEngine.get_or_create_market
+
+    def counting(self: MatchingEngine, market_id: MarketId) -> OrderBook:
+        engine_lookups.append(market_id)
+        return original(self, market_id)
+
+    monkeypatch.setattr(MatchingEngine, "get_or_create_market", counting)
+    req = {"type": "place_order", "side": "buy", "price": 40, "qty": 1, "user_id": "buyer"}
+
+    # Existing market: the interface's own probe is the only one
+    resp = await server.process_request({**req, "id": "a", "market_id": "alice,480"}, "internal_test")
+    assert resp["status"] == "ok"
+    assert engine_lookups == []
+
+    # New market: created (and named) once, then matched on the returned book
+    resp = await server.process_request({**req, "id": "b", "market_id": "alice,300"}, "internal_test")
+    assert resp["status"] == "ok"
+    alice_id = server.user_id_mapper.to_internal("alice")
+    assert engine_lookups == [(alice_id, 300)]
+    assert server.engine._market_names[(alice_id, 300)] == "alice Sleep 5:00"
+    assert server.engine._markets[(alice_id, 300)].get_best_bid() == 40
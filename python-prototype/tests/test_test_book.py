@@ -1,6 +1,11 @@
 # Usage: uv run pytest
 
+import random
+from collections.abc import Iterable
+
 from orderbook.book import OrderBook
+from orderbook.linked_list import OrderList
+from orderbook.types import PriceLevel
 
 
 def test_bid_priority() -> None:
@@ -35,8 +40,7 @@ def test_lazy_deletion_bids() -> None:
     # Cancel the best bid
     book.cancel_order(1)
 
-    # The heap still has 100 internally, but get_best_bid should skip it
-    # and return 99
+    # The emptied 100 level is gone, so get_best_bid should return 99
     assert book.get_best_bid() == 99
 
 
@@ -53,6 +57,26 @@ def test_lazy_deletion_asks() -> None:
     assert book.get_best_ask() == 101
 
 
+def test_cancel_requote_does_not_leak_levels() -> None:
+    """Repeatedly quoting and cancelling behind the best price keeps the lazy heap bounded."""
+    book = OrderBook()
+    book.add_order("buy", 100, 1, 0, user_id=1)
+    book.add_order("sell", 120, 1, 1, user_id=1)
+
+    for i in range(2, 10_002):
+        book.add_order("buy", 99, 1, i, user_id=1)
+        book.cancel_order(i)
+        book.add_order("sell", 121, 1, -i, user_id=1)
+        book.cancel_order(-i)
+
+    assert list(book._bids.keys()) == [100]
+    # Stale prices are compacted away once they outnumber the live levels
+    assert len(book._bids_heap) <= 2 * len(book._bids) + 32
+    assert len(book._asks_heap) <= 2 * len(book._asks) + 32
+    assert book.get_best_bid() == 100
+    assert book.get_best_ask() == 120
+
+
 def test_time_priority_fifo() -> None:
     """
     Scenario:
@@ -83,3 +107,87 @@ def test_time_priority_fifo() -> None:
     # Check book: Bob should still be there
     # (Assuming your book exposes a way to peek at the queue)
     # assert book.asks[100].head.order_id == 2
+
+
+def test_recycled_node_carries_new_order() -> None:
+    """A node freed by a cancel is reused for the next resting order, fully overwritten."""
+    book = OrderBook()
+    book.add_order("sell", 100, 10, 1, user_id=1)
+    spent = book._orders[1]
+    book.cancel_order(1)
+
+    book.add_order("buy", 90, 3, 2, user_id=2)
+    book.add_order("buy", 90, 4, 3, user_id=3)
+
+    node = book._orders[2]
+    assert node is spent
+    assert (node.order_id, node.user_id, node.price, node.quantity) == (2, 2, 90, 3)
+    assert node.prev_node is None and node.next_node is book._orders[3]
+    assert book.get_best_ask() is None
+    assert book._bids[90].total_volume == 7
+
+
+def test_cached_best_prices_follow_every_mutation() -> None:
+    """Top of book is cached between mutations but never served stale."""
+    book = OrderBook()
+    assert book.get_best_bid() is None and book.get_best_ask() is None
+
+    book.add_order("buy", 95, 5, 1, user_id=1)
+    book.add_order("sell", 105, 5, 2, user_id=2)
+    assert (book.get_best_bid(), book.get_best_ask()) == (95, 105)
+
+    book.process_order("buy", 97, 1, 3, user_id=3)  # New best bid
+    assert book.get_best_bid() == 97
+
+    book.process_order("sell", 90, 1, 4, user_id=4)  # Fills the 97 bid, level emptied
+    assert book.get_best_bid() == 95
+
+    book.cancel_order(2)
+    assert book.get_best_ask() is None
+
+
+def test_snapshot_reused_until_book_changes() -> None:
+    book = OrderBook()
+    book.add_order("buy", 95, 5, 1, user_id=1)
+
+    first = book.snapshot()
+    assert book.snapshot() is first
+
+    book.add_order("buy", 95, 2, 2, user_id=2)
+    second = book.snapshot()
+    assert second is not first
+    assert second["bids"] == [{"price": 95, "volume": 7, "count": 2}]
+
+
+def test_load_orders_keeps_saved_order_and_timestamps() -> None:
+    """Bulk-restored orders queue in saved order with their original timestamps."""
+    book = OrderBook()
+    book.load_orders("sell", [(7, 1, 60, 5, 100.0), (3, 2, 60, 4, 200.0), (9, 3, 65, 1, 300.0)])
+
+    assert book._orders[3].timestamp == 200.0
+    assert book._resting_qty == 10
+    assert book.get_best_ask() == 60
+
+    trades = book.process_order("buy", 60, 6, 10, user_id=4)
+    assert [(t.maker_order_id, t.quantity) for t in trades] == [(7, 5), (3, 1)]
+
+
+def test_snapshot_levels_match_order_walk() -> None:
+    """Snapshot rows come from running totals; they must equal a walk over each level's orders."""
+    rng = random.Random(11)
+    book = OrderBook()
+    for order_id in range(300):
+        if order_id % 4 == 3:
+            book.cancel_order(rng.randrange(order_id))
+        else:
+            book.process_order(rng.choice(["buy", "sell"]), rng.randint(90, 110), rng.randint(1, 10), order_id, 1)
+
+    def walked(levels: Iterable[tuple[int, OrderList]]) -> list[PriceLevel]:
+        return [
+            {"price": price, "volume": sum(o.quantity for o in level), "count": sum(1 for _ in level)}
+            for price, level in levels
+        ]
+
+    snapshot = book.snapshot()
+    assert snapshot["bids"] == walked(sorted(book._bids.items(), reverse=True))
+    assert snapshot["asks"] == walked(sorted(book._asks.items()))
@@ -0,0 +1,140 @@
+"""
+Test world save/load through the server's persistence helpers.
+
+Uses a temp DB_FILE so the developer's state.json is never touched.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import server
+from engine.engine import MatchingEngine
+from server import OrderBookServer
+
+
+@pytest.mark.asyncio
+async def test_save_and_load_roundtrip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Saved state should load back into a fresh server unchanged."""
+    db_file = str(tmp_path / "state.json")
+    monkeypatch.setattr(server, "DB_FILE", db_file)
+
+    original = OrderBookServer()
+    original.seed_dev_data()
+    await original.save_world_async()
+
+    # Atomic write: temp file is swapped into place, never left behind
+    assert os.path.exists(db_file)
+    assert os.listdir(tmp_path) == ["state.json"]
+
+    restored = OrderBookServer()
+    restored.load_world()
+
+    assert restored.economy.dump_state() == original.economy.dump_state()
+    assert restored.engine.dump_state() == original.engine.dump_state()
+    assert restored.user_id_mapper.dump_state() == original.user_id_mapper.dump_state()
+    assert restored.order_id_mapper.dump_state() == original.order_id_mapper.dump_state()
+
+
+@pytest.mark.asyncio
+async def test_async_save_writes_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """save_world_async should produce the same file as the blocking save."""
+    db_file = str(tmp_path / "state.json")
+    monkeypatch.setattr(server, "DB_FILE", db_file)
+
+    srv = OrderBookServer()
+    srv.seed_dev_data()
+    await srv.save_world_async()
+
+    with open(db_file, "rb") as f:
+        assert f.read() == srv._serialize_state()
+
+
+def test_concurrent_atomic_writes_do_not_collide(tmp_path: Path) -> None:
+    """A flush and a periodic save writing at once each land a whole file."""
+    db_file = str(tmp_path / "state.json")
+    payloads = [bytes([i]) * 100_000 for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda payload: server._atomic_write(db_file, payload), payloads))
+
+    with open(db_file, "rb") as f:
+        assert f.read() in payloads
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_engine_dump_reserializes_only_changed_markets() -> None:
+    """Untouched markets reuse their cached order lists; touched ones are rebuilt."""
+    engine = MatchingEngine()
+    engine.create_market((1, 480), "A")
+    engine.create_market((2, 480), "B")
+    engine.process_order(market_id=(1, 480), side="buy", price=40, quantity=5, order_id=1, user_id=1)
+    engine.process_order(market_id=(2, 480), side="sell", price=60, quantity=5, order_id=2, user_id=2)
+
+    first = engine.dump_state()["markets"]
+
+    # Only market (1, 480) changes
+    engine.cancel_order(1)
+    second = engine.dump_state()["markets"]
+
+    assert second["1,480"]["bids"] == []
+    assert second["2,480"]["asks"] is first["2,480"]["asks"]
+    assert second["2,480"]["asks"][0][0] == 2
+
+
+def test_engine_dump_keeps_every_order_in_a_level() -> None:
+    """Orders queued behind the head of a price level survive a save/load in FIFO order."""
+    engine = MatchingEngine()
+    engine.create_market((1, 480), "A")
+    for order_id in (1, 2, 3):
+        engine.process_order(market_id=(1, 480), side="sell", price=60, quantity=1, order_id=order_id, user_id=order_id)
+
+    state = engine.dump_state()
+    assert [row[0] for row in state["markets"]["1,480"]["asks"]] == [1, 2, 3]
+
+    restored = MatchingEngine()
+    restored.load_state(state)
+    assert restored.dump_state() == state
+    assert set(restored._order_registry) == {1, 2, 3}
+
+
+def test_engine_loads_legacy_order_dicts() -> None:
+    """Saves from before compact rows (one dict per order) still load."""
+    legacy = {
+        "markets": {
+            "1,480": {
+                "name": "A",
+                "bids": [{"id": 1, "user_id": 2, "price": 40, "qty": 5, "side": "buy", "timestamp": 10.0}],
+                "asks": [{"id": 2, "user_id": 3, "price": 60, "qty": 4, "side": "sell", "timestamp": 11.0}],
+            }
+        }
+    }
+    engine = MatchingEngine()
+    engine.load_state(legacy)
+
+    market = engine.dump_state()["markets"]["1,480"]
+    assert market["bids"] == [(1, 2, 40, 5, 10.0)]
+    assert market["asks"] == [(2, 3, 60, 4, 11.0)]
+
+
+@pytest.mark.asyncio
+async def test_flush_request_only_in_test_mode(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """With TEST_MODE the flush request has saved the world by the time it replies."""
+    db_file = str(tmp_path / "state.json")
+    monkeypatch.setattr(server, "DB_FILE", db_file)
+
+    prod = OrderBookServer()
+    resp = await prod.process_request({"type": "flush"}, "internal_test")
+    assert resp["status"] == "error"
+    assert not os.path.exists(db_file)
+
+    monkeypatch.setattr(server, "TEST_MODE", True)
+    srv = OrderBookServer()
+    srv.seed_dev_data()
+    resp = await srv.process_request({"type": "flush"}, "internal_test")
+    assert resp["status"] == "flushed"
+
+    with open(db_file, "rb") as f:
+        assert f.read() == srv._serialize_state()
@@ -1,13 +1,17 @@
 # Usage: PYTHONPATH=src uv run trigger_settle.py
 
 import asyncio
-import json
 import sys
 from typing import Final, TypedDict
 
+import orjson
+
 # Config
 HOST: Final[str] = "127.0.0.1"
 PORT: Final[int] = 8888
+# Length-prefixed framing (4-byte big-endian size, same as server.py); False sends NDJSON instead
+FRAMED: Final[bool] = True
+FRAME_HEADER_SIZE: Final[int] = 4
 
 
 # Type Defs
@@ -41,15 +45,24 @@ async def main() -> None:
 
     print(f"[!] [Oracle] Reporting violation: {payload['actual_screentime_minutes']} minutes used.")
 
-    # Send Data (NDJSON)
-    message = json.dumps(payload) + "\n"
-    writer.write(message.encode())
+    # Send Data
+    if FRAMED:
+        # Size header then body: the server reads exactly that many bytes, no newline scan
+        body = orjson.dumps(payload)
+        writer.write(len(body).to_bytes(FRAME_HEADER_SIZE, "big") + body)
+    else:
+        # NDJSON: orjson encodes straight to bytes, newline included
+        writer.write(orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE))
     await writer.drain()
 
     # Get Confirmation
-    # Server will return how many trades were liquidated
-    data = await reader.readuntil(b"\n")
-    response = json.loads(data.decode())
+    # Server will return how many trades were liquidated (framed the same way as the request)
+    if FRAMED:
+        size = int.from_bytes(await reader.readexactly(FRAME_HEADER_SIZE), "big")
+        data = await reader.readexactly(size)
+    else:
+        data = await reader.readuntil(b"\n")
+    response = orjson.loads(data)
 
     # Report Result
     if response.get("status") == "settled":